@@ -0,0 +1,34 @@
+"""
+Measures how bulk level generation scales with the number of worker processes.
+
+Run from the project root with: python -m benchmarks.bench_bulk_generation
+"""
+import os
+import time
+
+from bulk_generate import generate_levels
+
+SEEDS = list(range(16))
+DUNGEON_LEVELS = list(range(1, 5))
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({n for n in (1, 2, 4, 8, cores) if n <= cores})
+
+    print(f"{'workers':>7} {'levels/s':>9} {'speedup':>8}")
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        levels = len(generate_levels(SEEDS, DUNGEON_LEVELS, workers=workers))
+        rate = levels / (time.perf_counter() - start)
+        baseline = baseline or rate
+
+        print(f"{workers:>7} {rate:>9.1f} {rate / baseline:>7.2f}x")
+
+    if cores == 1:
+        print("Only one core is available, so there is nothing to scale across.")
+
+
+if __name__ == '__main__':
+    main()
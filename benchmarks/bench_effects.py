@@ -0,0 +1,65 @@
+"""
+Times a game turn of buff bookkeeping with many long-lived buffs active, comparing the EffectScheduler against
+ticking every buff down each turn.
+
+Run from the project root with: python -m benchmarks.bench_effects
+"""
+import time
+
+from components.buff import Buff, BuffType
+from components.fighter import Fighter
+from entity import Entity, EntityType
+from map_objects.game_map import GameMap
+
+BUFF_COUNTS = (100, 1000, 10000)
+TURNS = 200
+# Long enough that none of the buffs run out during the run, which is the case ticking handles worst.
+BUFF_TURNS = 10 ** 6
+
+
+def populate(buff_count: int) -> GameMap:
+    game_map = GameMap(100, 100)
+    for index in range(buff_count):
+        monster = Entity("Orc", EntityType.ACTOR, index % 100, index // 100 % 100, ord('o'),
+                         fighter=Fighter(hp=10, defense=0, power=3))
+        game_map.add_entity(monster)
+
+        buff = Buff(BuffType.POWER, 1, BUFF_TURNS)
+        buff.owner = monster
+        monster.add_buff(buff)
+
+    return game_map
+
+
+def scheduled_turns(game_map: GameMap) -> float:
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        game_map.effects.advance()
+
+    return (time.perf_counter() - start) / TURNS
+
+
+def ticked_turns(game_map: GameMap) -> float:
+    """ The old approach: every turn, count every buff of every entity down by one. """
+    buffs = [(entity, buff) for entity in game_map.entities for buff in entity.buffs]
+    remaining = {id(buff): BUFF_TURNS for _, buff in buffs}
+
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        for entity, buff in buffs:
+            remaining[id(buff)] -= 1
+            if remaining[id(buff)] <= 0:
+                entity.remove_buff(buff)
+
+    return (time.perf_counter() - start) / TURNS
+
+
+def main() -> None:
+    print(f"{'buffs':>7} {'ticked us':>10} {'scheduled us':>13}")
+    for buff_count in BUFF_COUNTS:
+        game_map = populate(buff_count)
+        print(f"{buff_count:>7} {ticked_turns(game_map) * 1e6:>10.1f} {scheduled_turns(game_map) * 1e6:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Measures memory per entity on a map, and compares scanning entities one object at a time with scanning the
+EntityStore columns.
+
+Run from the project root with: python -m benchmarks.bench_entity_store
+"""
+import time
+import tracemalloc
+
+import numpy as np
+
+from components.ai import BasicMonster
+from components.fighter import Fighter
+from entity import Entity, EntityType
+from map_objects.game_map import GameMap
+
+ENTITY_COUNTS = (1000, 10000, 100000)
+MAP_SIZE = 400
+RADIUS = 20
+QUERIES = 100
+SEED = 1
+
+
+def populate(count: int, game_map: GameMap = None) -> GameMap:
+    game_map = game_map if game_map is not None else GameMap(MAP_SIZE, MAP_SIZE)
+    positions = np.random.default_rng(SEED).integers(0, MAP_SIZE, size=(count, 2))
+    for x, y in positions.tolist():
+        game_map.add_entity(Entity("Orc", EntityType.ACTOR, x, y, ord('o'), fg=(63, 127, 63), blocks=True,
+                                   fighter=Fighter(hp=10, defense=0, power=3), ai=BasicMonster()))
+
+    return game_map
+
+
+def memory_per_entity(count: int) -> float:
+    game_map = GameMap(MAP_SIZE, MAP_SIZE)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    populate(count, game_map)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del game_map
+
+    return (after - before) / count
+
+
+def object_scan(game_map: GameMap, x: int, y: int) -> list:
+    return [entity for entity in game_map.entities
+            if entity.fighter and entity.distance(x, y) <= RADIUS]
+
+
+def column_scan(game_map: GameMap, x: int, y: int) -> list:
+    return game_map.entity_store.living_within(x, y, RADIUS)
+
+
+def time_scan(game_map: GameMap, queries: np.ndarray, scan) -> float:
+    start = time.perf_counter()
+    for x, y in queries:
+        scan(game_map, x, y)
+
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main() -> None:
+    queries = np.random.default_rng(SEED + 1).integers(0, MAP_SIZE, size=(QUERIES, 2)).tolist()
+
+    print(f"{'entities':>9} {'bytes/entity':>13} {'object us':>10} {'column us':>10} {'speedup':>8}")
+    for count in ENTITY_COUNTS:
+        per_entity = memory_per_entity(count)
+        game_map = populate(count)
+
+        assert all(sorted(map(id, object_scan(game_map, x, y))) == sorted(map(id, column_scan(game_map, x, y)))
+                   for x, y in queries[:10])
+
+        object_time = time_scan(game_map, queries, object_scan)
+        column_time = time_scan(game_map, queries, column_scan)
+
+        print(f"{count:>9} {per_entity:>13.0f} {object_time * 1e6:>10.1f} {column_time * 1e6:>10.1f} "
+              f"{object_time / column_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Replays a backtracking walk through generated levels with different FOV cache sizes, reporting the hit rate and
+what a computed FOV costs against a restored one.
+
+Run from the project root with: python -m benchmarks.bench_fov_cache
+"""
+import random
+import time
+
+import numpy as np
+
+from entity import Entity, EntityType
+from map_objects.fov_cache import FovCache
+from map_objects.game_map import GameMap
+
+import settings as const
+
+MAP_SIZES = (75, 150, 300)
+CACHE_SIZES = (0, 64, 256, 1024)
+STEPS = 5000
+# Chance each step of turning back the way the walker came, which is what makes the walk revisit tiles.
+BACKTRACK_CHANCE = 0.4
+SEED = 1
+
+
+def walk(game_map: GameMap, rng: random.Random) -> list:
+    """ A random walk over walkable tiles that often retraces its own steps. """
+    free = np.argwhere(game_map.fov_map.walkable)
+    x, y = (int(value) for value in free[rng.randrange(len(free))])
+    path = [(x, y)]
+    for _ in range(STEPS):
+        if len(path) > 1 and rng.random() < BACKTRACK_CHANCE:
+            path.append(path[-2])
+            continue
+
+        steps = [(x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                 if (dx or dy) and game_map.is_walkable(x + dx, y + dy)]
+        if steps:
+            x, y = rng.choice(steps)
+        path.append((x, y))
+
+    return path
+
+
+def main() -> None:
+    print(f"{'map':>5} {'cache':>6} {'hit rate':>9} {'compute us':>11} {'restore us':>11} {'per step us':>12} "
+          f"{'cache KB':>9}")
+    for map_size in MAP_SIZES:
+        stand_in = Entity("Player", EntityType.PLAYER, 0, 0, ord('@'))
+        game_map = GameMap(map_size, map_size)
+        game_map.make_map(const.MAX_ROOMS, const.ROOM_MIN_SIZE, const.ROOM_MAX_SIZE, map_size, map_size, stand_in,
+                          rng=random.Random(SEED))
+        path = walk(game_map, random.Random(SEED))
+
+        for cache_size in CACHE_SIZES:
+            cache = FovCache(cache_size)
+            start = time.perf_counter()
+            for x, y in path:
+                cache.compute(game_map.fov_map, x, y, game_map.revision, const.FOV_RADIUS, const.FOV_LIGHT_WALLS,
+                              const.FOV_ALGO)
+            per_step = (time.perf_counter() - start) / len(path)
+
+            stats = cache.stats()
+            print(f"{map_size:>5} {cache_size:>6} {stats['hit_rate']:>9.2f} {stats['mean_compute_us']:>11.1f} "
+                  f"{stats['mean_restore_us']:>11.1f} {per_step * 1e6:>12.1f} {stats['bytes'] / 1024:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
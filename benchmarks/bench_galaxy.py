@@ -0,0 +1,59 @@
+"""
+Times galaxy generation and compares grid queries against scanning every star system.
+
+Run from the project root with: python -m benchmarks.bench_galaxy
+"""
+import time
+
+import numpy as np
+
+from galaxy_objects.galaxy import Galaxy
+from random_utils import RandomStreams
+
+SYSTEM_COUNTS = (10 ** 4, 10 ** 5, 10 ** 6)
+QUERIES = 200
+VIEW_WIDTH, VIEW_HEIGHT = 76, 40
+RADIUS = 20
+
+
+def time_queries(queries: np.ndarray, query) -> float:
+    start = time.perf_counter()
+    for x, y in queries:
+        query(x, y)
+
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main() -> None:
+    print(f"{'systems':>9} {'generate s':>11} {'query':>9} {'grid us':>9} {'scan us':>9} {'speedup':>8}")
+    for count in SYSTEM_COUNTS:
+        size = int(count ** 0.5)
+        galaxy = Galaxy(size, size, count / (size * size))
+
+        start = time.perf_counter()
+        galaxy.generate_galaxy(RandomStreams(1).generator("galaxy"))
+        generate_time = time.perf_counter() - start
+
+        x, y, grid = galaxy.x, galaxy.y, galaxy.grid
+        queries = np.random.default_rng(2).uniform(0, size, size=(QUERIES, 2))
+
+        cases = (
+            ("nearest", grid.nearest,
+             lambda qx, qy: np.argmin(np.hypot(x - qx, y - qy))),
+            ("radius", lambda qx, qy: grid.within_radius(qx, qy, RADIUS),
+             lambda qx, qy: np.flatnonzero((x - qx) ** 2 + (y - qy) ** 2 <= RADIUS ** 2)),
+            ("viewport", lambda qx, qy: grid.in_rect(qx, qy, qx + VIEW_WIDTH, qy + VIEW_HEIGHT),
+             lambda qx, qy: np.flatnonzero((x >= qx) & (x <= qx + VIEW_WIDTH) &
+                                           (y >= qy) & (y <= qy + VIEW_HEIGHT)))
+        )
+
+        for index, (name, grid_query, scan_query) in enumerate(cases):
+            grid_time = time_queries(queries, grid_query)
+            scan_time = time_queries(queries, scan_query)
+            label = f"{count:>9} {generate_time:>11.2f}" if index == 0 else f"{'':>9} {'':>11}"
+
+            print(f"{label} {name:>9} {grid_time * 1e6:>9.1f} {scan_time * 1e6:>9.1f} {scan_time / grid_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
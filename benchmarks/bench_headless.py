@@ -0,0 +1,71 @@
+"""
+Measures how many turns per second the headless engine plays with the bot policy, by map size and monster count.
+
+Run from the project root with: python -m benchmarks.bench_headless
+"""
+import random
+
+import numpy as np
+
+from engine import GameSession
+from entity import Entity, EntityType
+from components.ai import BasicMonster
+from components.equipment import Equipment
+from components.fighter import Fighter
+from components.inventory import Inventory
+from components.level import Level
+from game_messages import MessageLog
+from game_state import GameState
+from headless import BotPolicy, run_headless
+from map_objects.dungeon import Dungeon
+from map_objects.game_map import GameMap
+
+import settings as const
+
+MAP_SIZES = (75, 150, 300)
+MONSTER_COUNTS = (10, 100, 1000)
+TURNS = 500
+
+
+def build_session(map_size: int, monster_count: int, seed: int) -> GameSession:
+    # The player can't die, so every run plays the full number of turns.
+    player = Entity("Player", EntityType.PLAYER, 0, 0, ord('@'), blocks=True,
+                    fighter=Fighter(hp=10 ** 9, defense=10 ** 6, power=1), inventory=Inventory(26), level=Level(),
+                    equipment=Equipment())
+    game_map = GameMap(map_size, map_size)
+    game_map.make_map(10000, 6, 10, map_size, map_size, player, rng=random.Random(seed))
+    game_map.rng = random.Random(seed)
+
+    for entity in list(game_map.entities):
+        if entity.ai:
+            game_map.remove_entity(entity)
+
+    free = np.argwhere(game_map.fov_map.walkable)
+    free = free[(free[:, 0] != player.x) | (free[:, 1] != player.y)]
+    rng = np.random.default_rng(seed)
+    for x, y in free[rng.choice(len(free), size=min(monster_count, len(free)), replace=False)]:
+        # Monsters can't die either, so the count stays fixed for the whole run.
+        monster = Entity("Orc", EntityType.ACTOR, int(x), int(y), ord('o'), blocks=True,
+                         fighter=Fighter(hp=10 ** 9, defense=0, power=1), ai=BasicMonster())
+        game_map.add_entity(monster)
+
+    game_map.add_entity(player)
+    dungeon = Dungeon()
+    dungeon[1] = game_map
+
+    return GameSession(player, dungeon, MessageLog(0, const.LOG_WIDTH, const.LOG_HEIGHT), GameState.PLAYER_TURN,
+                       1, autosave_interval=0)
+
+
+def main() -> None:
+    print(f"{'map':>9} {'monsters':>8} {'turns/sec':>10}")
+    for map_size in MAP_SIZES:
+        for monster_count in MONSTER_COUNTS:
+            session = build_session(map_size, monster_count, seed=1)
+            stats = run_headless(session, BotPolicy(seed=1, take_stairs=False), max_turns=TURNS)
+
+            print(f"{map_size:>4}x{map_size:<4} {monster_count:>8} {stats['turns_per_second']:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Compares room placement in make_map against the previous linear scans, and checks both build the same level.
+
+Run from the project root with: python -m benchmarks.bench_make_map
+"""
+import random
+import time
+from math import sqrt
+from typing import List
+
+import numpy as np
+
+from entity import Entity, EntityType
+from components.fighter import Fighter
+from map_objects.game_map import GameMap
+from map_objects.rect import Rect
+
+import settings as const
+
+MAP_SIZES = (75, 150, 300, 600, 1000)
+SEED = 1
+
+
+class LegacyGameMap(GameMap):
+    """ The previous behaviour: every attempt is tested against every room, then scanned again for the nearest. """
+    def make_map(self, max_rooms: int, room_min_size: int, room_max_size: int, map_width: int,
+                 map_height: int, player: Entity, rng: random.Random):
+        rooms = []
+
+        center_of_last_room_x = None
+        center_of_last_room_y = None
+
+        for r in range(max_rooms):
+            w = rng.randint(room_min_size, room_max_size)
+            h = rng.randint(room_min_size, room_max_size)
+            x = rng.randint(0, map_width - w - 2)
+            y = rng.randint(0, map_height - h - 2)
+
+            new_room = Rect(x, y, w, h)
+
+            if any(new_room.intersect(other_room) for other_room in rooms):
+                continue
+
+            self.dig_room(new_room)
+            new_x, new_y = new_room.center()
+            center_of_last_room_x, center_of_last_room_y = new_x, new_y
+
+            if not rooms:
+                player.x, player.y = new_x, new_y
+                self.start_x, self.start_y = new_x, new_y
+            else:
+                prev_x, prev_y = find_nearest_room(new_room, rooms).center()
+
+                if rng.randint(0, 1) == 1:
+                    self.dig_h_tunnel(new_x, prev_x, new_y)
+                    self.dig_v_tunnel(prev_x, prev_y, new_y)
+                else:
+                    self.dig_v_tunnel(new_x, new_y, prev_y)
+                    self.dig_h_tunnel(new_x, prev_x, prev_y)
+
+                self.place_entities(new_room, rng)
+
+            rooms.append(new_room)
+
+        self.end_x = center_of_last_room_x
+        self.end_y = center_of_last_room_y
+
+
+def find_nearest_room(room: Rect, others: List[Rect]) -> Rect:
+    nearest = room
+    shortest_distance = 10000
+    for other in others:
+        x, y = room.center()
+        o_x, o_y = other.center()
+        if shortest_distance > distance(x, y, o_x, o_y) and x != o_x and y != o_y:
+            shortest_distance = distance(x, y, o_x, o_y)
+            nearest = other
+
+    return nearest
+
+
+def distance(x1: int, y1: int, x2: int, y2: int) -> int:
+    return int(sqrt((x2 - x1)**2 + (y2 - y1)**2))
+
+
+def build(map_class, map_size: int):
+    player = Entity("Player", EntityType.PLAYER, 0, 0, ord('@'), blocks=True, fighter=Fighter(hp=100, defense=1,
+                                                                                              power=2))
+    game_map = map_class(map_size, map_size)
+
+    start = time.perf_counter()
+    game_map.make_map(const.MAX_ROOMS, const.ROOM_MIN_SIZE, const.ROOM_MAX_SIZE, map_size, map_size, player,
+                      rng=random.Random(SEED))
+
+    return game_map, time.perf_counter() - start
+
+
+def same_level(a: GameMap, b: GameMap) -> bool:
+    def entities(game_map: GameMap):
+        return sorted((e.x, e.y, e.name) for e in game_map.entities if e.stairs is None)
+
+    return (np.array_equal(a.fov_map.walkable, b.fov_map.walkable) and
+            np.array_equal(a.tile_map.lit, b.tile_map.lit) and
+            (a.start_x, a.start_y, a.end_x, a.end_y) == (b.start_x, b.start_y, b.end_x, b.end_y) and
+            entities(a) == entities(b))
+
+
+def main() -> None:
+    print(f"{'map':>9} {'legacy ms':>10} {'new ms':>8} {'speedup':>8} {'same level':>11}")
+    for map_size in MAP_SIZES:
+        legacy_map, legacy_time = build(LegacyGameMap, map_size)
+        new_map, new_time = build(GameMap, map_size)
+
+        print(f"{map_size:>4}x{map_size:<4} {legacy_time * 1000:>10.1f} {new_time * 1000:>8.1f} "
+              f"{legacy_time / new_time:>7.1f}x {str(same_level(legacy_map, new_map)):>11}")
+
+
+if __name__ == '__main__':
+    main()
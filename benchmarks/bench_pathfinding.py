@@ -0,0 +1,92 @@
+"""
+Compares the enemy phase with one A* per monster against the shared per-turn flow field.
+
+Run from the project root with: python -m benchmarks.bench_pathfinding
+"""
+import random
+import time
+from typing import List, Tuple
+
+import numpy as np
+import tcod
+import tcod.path
+
+from entity import Entity, EntityType
+from components.ai import BasicMonster
+from components.fighter import Fighter
+from map_objects.game_map import GameMap
+
+MAP_SIZE = 150
+MONSTER_COUNTS = (10, 100, 1000)
+TURNS = 5
+
+
+class AStarMonster(BasicMonster):
+    """ The previous behaviour: a fresh A* path for every monster on every turn. """
+    def take_turn(self, target: Entity, game_map: GameMap, entities: List[Entity]) -> List:
+        monster = self.owner
+        if tcod.map_is_in_fov(game_map.fov_map, monster.x, monster.y) and monster.distance_to(target) >= 2:
+            astar = tcod.path.AStar(game_map.fov_map.walkable)
+            path = astar.get_path(monster.x, monster.y, target.x, target.y)
+            if path:
+                dest_x, dest_y = path[0]
+                monster.move(dest_x - monster.x, dest_y - monster.y, entities, game_map)
+
+        return []
+
+
+def build_map(seed: int) -> Tuple[GameMap, Entity]:
+    player = Entity("Player", EntityType.PLAYER, 0, 0, ord('@'), blocks=True,
+                    fighter=Fighter(hp=100000, defense=1000, power=0))
+    game_map = GameMap(MAP_SIZE, MAP_SIZE)
+    game_map.make_map(10000, 6, 10, MAP_SIZE, MAP_SIZE, player, rng=random.Random(seed))
+
+    return game_map, player
+
+
+def populate(game_map: GameMap, player: Entity, positions: np.ndarray, ai_class) -> None:
+    for entity in list(game_map.entities):
+        game_map.remove_entity(entity)
+
+    game_map.add_entity(player)
+    for x, y in positions:
+        monster = Entity("Orc", EntityType.ACTOR, int(x), int(y), ord('o'), blocks=True,
+                         fighter=Fighter(hp=20, defense=0, power=0), ai=ai_class())
+        game_map.add_entity(monster)
+
+    # Every monster is treated as visible so they all pathfind.
+    game_map.fov_map.fov[:] = True
+    game_map.flow_field = None
+
+
+def time_turns(game_map: GameMap, player: Entity) -> float:
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        for entity in list(game_map.entities):
+            if entity.ai:
+                entity.ai.take_turn(player, game_map, game_map.entities)
+
+    return (time.perf_counter() - start) / TURNS
+
+
+def main() -> None:
+    game_map, player = build_map(seed=1)
+    free = np.argwhere(game_map.fov_map.walkable)
+    free = free[(free[:, 0] != player.x) | (free[:, 1] != player.y)]
+    rng = np.random.default_rng(1)
+
+    print(f"{'monsters':>8} {'astar ms/turn':>14} {'flow field ms/turn':>19} {'speedup':>8}")
+    for count in MONSTER_COUNTS:
+        positions = free[rng.choice(len(free), size=min(count, len(free)), replace=False)]
+
+        populate(game_map, player, positions, AStarMonster)
+        astar_time = time_turns(game_map, player)
+
+        populate(game_map, player, positions, BasicMonster)
+        flow_time = time_turns(game_map, player)
+
+        print(f"{count:>8} {astar_time * 1000:>14.2f} {flow_time * 1000:>19.2f} {astar_time / flow_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
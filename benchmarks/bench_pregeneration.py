@@ -0,0 +1,65 @@
+"""
+Measures the hitch when taking the down stairs, with the next level built synchronously and in the background.
+
+Run from the project root with: python -m benchmarks.bench_pregeneration
+"""
+import time
+from typing import List
+
+import numpy as np
+
+from engine import GameSession, process_action
+from headless import new_session
+from map_objects.level_pregenerator import LevelPregenerator
+
+DESCENTS = 8
+# How long the player spends on each level before heading down, in seconds.
+TIME_ON_LEVEL = 0.5
+SEED = 1
+
+
+def descend(session: GameSession) -> List[float]:
+    hitches = []
+    for _ in range(DESCENTS):
+        game_map = session.game_map
+        session.player.x, session.player.y = game_map.end_x, game_map.end_y
+        game_map.update_entity(session.player)
+
+        time.sleep(TIME_ON_LEVEL)
+
+        start = time.perf_counter()
+        process_action(session, {"take_stairs": True})
+        hitches.append(time.perf_counter() - start)
+
+    return hitches
+
+
+def level_signature(session: GameSession, dungeon_level: int):
+    game_map = session.dungeon[dungeon_level]
+
+    return (game_map.tile_map.glyph.tobytes(), sorted((e.x, e.y, e.name) for e in game_map.entities))
+
+
+def main() -> None:
+    sync_session = new_session(SEED)
+    sync_hitches = descend(sync_session)
+
+    background_session = new_session(SEED)
+    background_session.dungeon.pregenerator = LevelPregenerator(background_session.dungeon.streams)
+    background_session.dungeon.pregenerate(2)
+    try:
+        background_hitches = descend(background_session)
+    finally:
+        background_session.dungeon.pregenerator.shutdown()
+
+    same = all(level_signature(sync_session, level) == level_signature(background_session, level)
+               for level in range(2, DESCENTS + 2))
+
+    print(f"{'':>12} {'mean ms':>8} {'max ms':>8}")
+    for name, hitches in (("synchronous", sync_hitches), ("background", background_hitches)):
+        print(f"{name:>12} {np.mean(hitches) * 1000:>8.1f} {np.max(hitches) * 1000:>8.1f}")
+    print(f"Levels identical: {same}")
+
+
+if __name__ == '__main__':
+    main()
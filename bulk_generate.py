@@ -0,0 +1,133 @@
+"""
+Generates many dungeon levels offline across a process pool, for checking spawn tables and level layouts.
+
+Example, levels 1 to 10 for seeds 0 to 99 on every core:
+
+    python bulk_generate.py --levels 1-10 --seeds 0-99 --output levels.zip
+
+Each level is stored as GameMap.to_bytes data under levels/<seed>/<dungeon_level>.npz, with the per-level
+statistics in stats.json next to them.
+"""
+import argparse
+import json
+import os
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from entity import Entity, EntityType
+from map_objects.dungeon import Dungeon
+from random_utils import RandomStreams
+
+
+def parse_range(text: str) -> List[int]:
+    """ Parses "3", "1-10" or "1,4,7-9" into a list of ints. """
+    values = []
+    for part in text.split(","):
+        first, _, last = part.partition("-")
+        values.extend(range(int(first), int(last or first) + 1))
+
+    return values
+
+
+def generate_level(job: Tuple[int, int]) -> Tuple[Dict, bytes]:
+    """ Builds one level and returns its statistics and GameMap.to_bytes data. """
+    seed, dungeon_level = job
+    stand_in = Entity("Player", EntityType.PLAYER, 0, 0, ord('@'))
+
+    start = time.perf_counter()
+    game_map = Dungeon(streams=RandomStreams(seed)).generate_level(dungeon_level, stand_in)
+    elapsed = time.perf_counter() - start
+
+    monsters = Counter(entity.name for entity in game_map.entities if entity.ai)
+    items = Counter(entity.name for entity in game_map.entities if entity.item or entity.equippable)
+
+    stats = {
+        "seed": seed,
+        "dungeon_level": dungeon_level,
+        "seconds": elapsed,
+        "rooms": game_map.room_count,
+        "walkable_fraction": float(game_map.fov_map.walkable.mean()),
+        "monsters": dict(monsters),
+        "items": dict(items)
+    }
+
+    return stats, game_map.to_bytes()
+
+
+def generate_levels(seeds: List[int], dungeon_levels: List[int], output: str = None, workers: int = None) -> List[Dict]:
+    """ Generates every combination of seed and dungeon level on a process pool, optionally writing them out. """
+    jobs = [(seed, dungeon_level) for seed in seeds for dungeon_level in dungeon_levels]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (workers * 4))
+    all_stats = []
+
+    save_file = zipfile.ZipFile(output, mode="w") if output else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for stats, data in executor.map(generate_level, jobs, chunksize=chunksize):
+                all_stats.append(stats)
+                if save_file is not None:
+                    # Levels are already compressed by npz, so they are stored as-is.
+                    save_file.writestr(f"levels/{stats['seed']}/{stats['dungeon_level']}.npz", data)
+
+        if save_file is not None:
+            save_file.writestr("stats.json", json.dumps(all_stats), compress_type=zipfile.ZIP_DEFLATED)
+    finally:
+        if save_file is not None:
+            save_file.close()
+
+    return all_stats
+
+
+def summarize(all_stats: List[Dict]) -> str:
+    """ Averages the statistics of each dungeon level over every seed, one table row per level. """
+    by_level: Dict[int, List[Dict]] = {}
+    for stats in all_stats:
+        by_level.setdefault(stats["dungeon_level"], []).append(stats)
+
+    names = sorted({name for stats in all_stats for name in (*stats["monsters"], *stats["items"])})
+    header = f"{'level':>5} {'count':>5} {'mean ms':>8} {'max ms':>8} {'rooms':>6} {'walkable':>8}"
+    lines = [header + "".join(f" {name[:12]:>12}" for name in names)]
+
+    for dungeon_level in sorted(by_level):
+        level_stats = by_level[dungeon_level]
+        seconds = np.array([stats["seconds"] for stats in level_stats])
+        line = (f"{dungeon_level:>5} {len(level_stats):>5} {seconds.mean() * 1000:>8.1f} {seconds.max() * 1000:>8.1f} "
+                f"{np.mean([stats['rooms'] for stats in level_stats]):>6.1f} "
+                f"{np.mean([stats['walkable_fraction'] for stats in level_stats]):>8.3f}")
+
+        for name in names:
+            count = np.mean([stats["monsters"].get(name, 0) + stats["items"].get(name, 0) for stats in level_stats])
+            line += f" {count:>12.2f}"
+
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate dungeon levels in bulk and report on them.")
+    parser.add_argument("--levels", default="1-10", help="dungeon levels to generate, e.g. 1-10 or 1,3,5")
+    parser.add_argument("--seeds", default="0-99", help="seeds to generate each level for, e.g. 0-99")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--output", default=None, help="zip file to write the levels and stats.json to")
+    args = parser.parse_args()
+
+    seeds = parse_range(args.seeds)
+    dungeon_levels = parse_range(args.levels)
+
+    start = time.perf_counter()
+    all_stats = generate_levels(seeds, dungeon_levels, args.output, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(summarize(all_stats))
+    print(f"\n{len(all_stats)} levels in {elapsed:.2f}s ({len(all_stats) / elapsed:.1f} levels/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,5 @@
 from typing import List, Dict
 import tcod
-import tcod.path
-from random import randint
 from game_messages import Message
 from enum import Enum, auto
 
@@ -30,6 +28,9 @@ def get_ai(json_data):
 
 # noinspection PyUnresolvedReferences
 class BasicMonster:
+    # Only acts on a player it can see, so it can doze while the player is far away.
+    dormant_when_far = True
+
     def __init__(self):
         self.ai_type = AIType.BasicMonster
 
@@ -44,13 +45,14 @@ class BasicMonster:
         results = []
 
         monster = self.owner
-        if tcod.map_is_in_fov(game_map.fov_map, monster.x, monster.y):
+        if game_map.fov_map.fov[monster.x, monster.y]:
             if monster.distance_to(target) >= 2:
-                astar = tcod.path.AStar(game_map.fov_map.walkable)
-                dest_x, dest_y = astar.get_path(monster.x, monster.y, target.x, target.y)[0]
-                dx = dest_x - monster.x
-                dy = dest_y - monster.y
-                monster.move(dx, dy, entities, game_map)
+                flow_field = game_map.get_flow_field(target.x, target.y)
+                step = flow_field.next_step(monster.x, monster.y, game_map)
+
+                if step is not None:
+                    dx, dy = step
+                    monster.move(dx, dy, entities, game_map)
             elif target.fighter.hp > 0:
                 attack_results = monster.fighter.attack(target)
                 results.extend(attack_results)
@@ -60,6 +62,8 @@ class BasicMonster:
 
 # noinspection PyUnresolvedReferences
 class ConfusedMonster:
+    dormant_when_far = False
+
     def __init__(self, prev_ai, num_turns: int = 10):
         self.ai_type = AIType.ConfusedMonster
         self.prev_ai = prev_ai
@@ -78,8 +82,8 @@ class ConfusedMonster:
         results = []
 
         if self.num_turns > 0:
-            rand_x = self.owner.x + randint(0, 2) - 1
-            rand_y = self.owner.y + randint(0, 2) - 1
+            rand_x = self.owner.x + game_map.rng.randint(0, 2) - 1
+            rand_y = self.owner.y + game_map.rng.randint(0, 2) - 1
 
             if rand_x != self.owner.x and rand_y != self.owner.y:
                 self.owner.move_towards(rand_x, rand_y, game_map, entities)
@@ -9,11 +9,36 @@ class BuffType(Enum):
     MAX_HP = auto()
 
 
+# The Fighter stat each type of buff adds to.
+BUFF_STATS = {
+    BuffType.POWER: "power",
+    BuffType.DEFENSE: "defense",
+    BuffType.MAX_HP: "max_hp"
+}
+
+
 class Buff:
     def __init__(self, buff_type: BuffType, bonus: int = 0, num_turns: int = 1):
         self.buff_type = buff_type
-        self.num_turns = num_turns
         self.bonus = bonus
+        # While the buff's entity is on a map, its EffectScheduler counts the turns down towards expires_on.
+        self.scheduler = None
+        self.expires_on = 0
+        self._num_turns = num_turns
+
+    @property
+    def num_turns(self) -> int:
+        """ The turns the buff has left. """
+        if self.scheduler is None:
+            return self._num_turns
+
+        return self.expires_on - self.scheduler.turn
+
+    @num_turns.setter
+    def num_turns(self, num_turns: int) -> None:
+        self._num_turns = num_turns
+        if self.scheduler is not None:
+            self.scheduler.schedule(self)
 
     def to_json(self) -> Dict:
         json_data = {
@@ -35,23 +60,23 @@ class Buff:
 
         return Buff(buff_type, bonus, num_turns)
 
-    def tick_down(self) -> List:
-        self.num_turns -= 1
+    @property
+    def stat(self) -> str:
+        return BUFF_STATS[self.buff_type]
 
+    def expire(self) -> List:
+        """ Undoes what's left of the buff once its scheduler has removed it from its owner. """
         results = []
 
-        if self.num_turns <= 0:
-            if self.buff_type == BuffType.POWER:
-                results.append({'message': Message("You feel your strength return to normal.", (255, 255, 0))})
-            elif self.buff_type == BuffType.DEFENSE:
-                results.append({'message': Message("You feel your skin return to normal.", (255, 255, 0))})
-            else:
-                results.append({'message': Message("You feel your health return to normal.", (255, 255, 0))})
+        if self.buff_type == BuffType.POWER:
+            results.append({'message': Message("You feel your strength return to normal.", (255, 255, 0))})
+        elif self.buff_type == BuffType.DEFENSE:
+            results.append({'message': Message("You feel your skin return to normal.", (255, 255, 0))})
+        else:
+            results.append({'message': Message("You feel your health return to normal.", (255, 255, 0))})
 
-            self.owner.remove_buff(self)
-            if self.buff_type == BuffType.MAX_HP:
-                if self.owner.fighter.hp > self.owner.fighter.max_hp:
-                    self.owner.fighter.hp = self.owner.fighter.max_hp
+        if self.buff_type == BuffType.MAX_HP and self.owner.fighter is not None:
+            if self.owner.fighter.hp > self.owner.fighter.max_hp:
+                self.owner.fighter.hp = self.owner.fighter.max_hp
 
         return results
-
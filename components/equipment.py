@@ -4,6 +4,11 @@ from equipment_slots import EquipmentSlots
 
 class Equipment:
     def __init__(self, main_hand=None, off_hand=None):
+        self.owner = None
+        # What is equipped in each slot, with None (or no key) for an empty one.
+        self.slots: Dict[EquipmentSlots, "Entity"] = {}
+        self._bonuses = None
+
         self.main_hand = main_hand
         self.off_hand = off_hand
 
@@ -36,65 +41,71 @@ class Equipment:
         # return Equipment(main_hand, off_hand)
 
     @property
-    def max_hp_bonus(self) -> int:
-        bonus = 0
+    def main_hand(self) -> Union["Entity", None]:
+        return self.slots.get(EquipmentSlots.MAIN_HAND)
 
-        if self.main_hand and self.main_hand.equippable:
-            bonus += self.main_hand.equippable.max_hp_bonus
+    @main_hand.setter
+    def main_hand(self, entity: Union["Entity", None]) -> None:
+        self.slots[EquipmentSlots.MAIN_HAND] = entity
+        self.changed()
 
-        if self.off_hand and self.off_hand.equippable:
-            bonus += self.off_hand.equippable.max_hp_bonus
+    @property
+    def off_hand(self) -> Union["Entity", None]:
+        return self.slots.get(EquipmentSlots.OFF_HAND)
 
-        return bonus
+    @off_hand.setter
+    def off_hand(self, entity: Union["Entity", None]) -> None:
+        self.slots[EquipmentSlots.OFF_HAND] = entity
+        self.changed()
 
     @property
-    def power_bonus(self) -> int:
-        bonus = 0
-
-        if self.main_hand and self.main_hand.equippable:
-            bonus += self.main_hand.equippable.power_bonus
+    def bonuses(self) -> Dict[str, int]:
+        """ The summed bonus of everything equipped to each Fighter stat. """
+        if self._bonuses is None:
+            bonuses = {}
+            for entity in self.slots.values():
+                if entity and entity.equippable:
+                    for stat, bonus in entity.equippable.bonuses.items():
+                        bonuses[stat] = bonuses.get(stat, 0) + bonus
 
-        if self.off_hand and self.off_hand.equippable:
-            bonus += self.off_hand.equippable.power_bonus
+            self._bonuses = bonuses
 
-        return bonus
+        return self._bonuses
 
     @property
-    def defense_bonus(self):
-        bonus = 0
+    def max_hp_bonus(self) -> int:
+        return self.bonuses.get("max_hp", 0)
 
-        if self.main_hand and self.main_hand.equippable:
-            bonus += self.main_hand.equippable.defense_bonus
+    @property
+    def power_bonus(self) -> int:
+        return self.bonuses.get("power", 0)
 
-        if self.off_hand and self.off_hand.equippable:
-            bonus += self.off_hand.equippable.defense_bonus
+    @property
+    def defense_bonus(self) -> int:
+        return self.bonuses.get("defense", 0)
 
-        return bonus
+    def changed(self) -> None:
+        """ Drops the cached bonuses, here and in the owner's stats, after something was equipped or taken off. """
+        self._bonuses = None
+        if self.owner is not None and self.owner.fighter is not None:
+            self.owner.fighter.invalidate_stats()
 
     def toggle_equip(self, equippable_entity: "Entity") -> List:
         results = []
 
         slot = equippable_entity.equippable.slot
+        current = self.slots.get(slot)
+
+        if current == equippable_entity:
+            self.slots[slot] = None
+            results.append({"dequipped": equippable_entity})
+        else:
+            if current:
+                results.append({"dequipped": current})
+
+            self.slots[slot] = equippable_entity
+            results.append({"equipped": equippable_entity})
 
-        if slot == EquipmentSlots.MAIN_HAND:
-            if self.main_hand == equippable_entity:
-                self.main_hand = None
-                results.append({"dequipped": equippable_entity})
-            else:
-                if self.main_hand:
-                    results.append({"dequipped": self.main_hand})
-
-                self.main_hand = equippable_entity
-                results.append({"equipped": equippable_entity})
-        elif slot == EquipmentSlots.OFF_HAND:
-            if self.off_hand == equippable_entity:
-                self.off_hand = None
-                results.append({"dequipped": equippable_entity})
-            else:
-                if self.off_hand:
-                    results.append({"dequipped": self.off_hand})
-
-                self.off_hand = equippable_entity
-                results.append({"equipped": equippable_entity})
+        self.changed()
 
         return results
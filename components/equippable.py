@@ -30,3 +30,8 @@ class Equippable:
         max_hp_bonus = json_data["max_hp_bonus"]
 
         return Equippable(slot, power_bonus, defense_bonus, max_hp_bonus)
+
+    @property
+    def bonuses(self) -> Dict[str, int]:
+        """ The item's bonus to each Fighter stat. """
+        return {"max_hp": self.max_hp_bonus, "power": self.power_bonus, "defense": self.defense_bonus}
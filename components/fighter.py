@@ -1,16 +1,57 @@
 from typing import List, Dict, Union
 from game_messages import Message
-from components.buff import BuffType
+
+import settings as const
+
+
+class BaseStat:
+    """ A Fighter's stat before bonuses. Setting it, as levelling up does, invalidates the derived stats. """
+    def __init__(self, stat: str):
+        self.stat = stat
+
+    def __get__(self, fighter: "Fighter", owner):
+        if fighter is None:
+            return self
+
+        return fighter.base_stats[self.stat]
+
+    def __set__(self, fighter: "Fighter", value: int) -> None:
+        fighter.base_stats[self.stat] = value
+        fighter.invalidate_stats()
+
+
+class DerivedStat:
+    """ A Fighter's stat with bonuses, read from the cached Fighter.stats. """
+    def __init__(self, stat: str):
+        self.stat = stat
+
+    def __get__(self, fighter: "Fighter", owner):
+        if fighter is None:
+            return self
+
+        return fighter.stats[self.stat]
 
 
 # noinspection PyUnresolvedReferences
 class Fighter:
-    def __init__(self, hp: int, defense: int, power: int, xp: int = 0):
+    base_max_hp = BaseStat("max_hp")
+    base_power = BaseStat("power")
+    base_defense = BaseStat("defense")
+
+    max_hp = DerivedStat("max_hp")
+    power = DerivedStat("power")
+    defense = DerivedStat("defense")
+
+    def __init__(self, hp: int, defense: int, power: int, xp: int = 0, speed: int = const.NORMAL_SPEED):
+        self.owner = None
+        self.base_stats: Dict[str, int] = {}
+        self._stats = None
         self.base_max_hp = hp
         self.hp = hp
         self.base_defense = defense
         self.base_power = power
         self.xp = xp
+        self.speed = speed
 
     def to_json(self) -> Dict:
         json_data = {
@@ -18,7 +59,8 @@ class Fighter:
             "current_hp": self.hp,
             "base_defense": self.base_defense,
             "base_power": self.base_power,
-            "xp": self.xp
+            "xp": self.xp,
+            "speed": self.speed
         }
 
         return json_data
@@ -31,8 +73,9 @@ class Fighter:
             base_defense = json_data["base_defense"]
             base_power = json_data["base_power"]
             xp = json_data["xp"]
+            speed = json_data.get("speed", const.NORMAL_SPEED)
 
-            fighter = Fighter(base_max_hp, base_defense, base_power, xp=xp)
+            fighter = Fighter(base_max_hp, base_defense, base_power, xp=xp, speed=speed)
             fighter.hp = current_hp
             fighter.base_max_hp = base_max_hp
             fighter.base_defense = base_defense
@@ -43,43 +86,35 @@ class Fighter:
         return None
 
     @property
-    def max_hp(self) -> int:
-        if self.owner and self.owner.equipment:
-            bonus = self.owner.equipment.max_hp_bonus
-        else:
-            bonus = 0
-
-        for buff in self.owner.buffs:
-            if buff.buff_type == BuffType.MAX_HP:
-                bonus += buff.bonus
+    def hp(self) -> int:
+        return self._hp
 
-        return self.base_max_hp + bonus
+    @hp.setter
+    def hp(self, hp: int) -> None:
+        self._hp = hp
+        # Keeps the hp and alive columns of the owner's row current.
+        if self.owner is not None and self.owner.store is not None:
+            self.owner.store.update_fighter(self.owner)
 
     @property
-    def power(self) -> int:
-        if self.owner and self.owner.equipment:
-            bonus = self.owner.equipment.power_bonus
-        else:
-            bonus = 0
+    def stats(self) -> Dict[str, int]:
+        """ Each stat with the owner's equipment and buff bonuses added, worked out again only after they change. """
+        if self._stats is None:
+            stats = dict(self.base_stats)
 
-        for buff in self.owner.buffs:
-            if buff.buff_type == BuffType.POWER:
-                bonus += buff.bonus
+            if self.owner and self.owner.equipment:
+                for stat, bonus in self.owner.equipment.bonuses.items():
+                    stats[stat] = stats.get(stat, 0) + bonus
 
-        return self.base_power + bonus
+            for buff in self.owner.buffs:
+                stats[buff.stat] = stats.get(buff.stat, 0) + buff.bonus
 
-    @property
-    def defense(self) -> int:
-        if self.owner and self.owner.equipment:
-            bonus = self.owner.equipment.defense_bonus
-        else:
-            bonus = 0
+            self._stats = stats
 
-        for buff in self.owner.buffs:
-            if buff.buff_type == BuffType.DEFENSE:
-                bonus += buff.bonus
+        return self._stats
 
-        return self.base_defense + bonus
+    def invalidate_stats(self) -> None:
+        self._stats = None
 
     def take_damage(self, amount: int) -> List:
         results = []
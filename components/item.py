@@ -1,6 +1,6 @@
 from typing import Dict, Union
 from game_messages import Message
-from item_functions import heal, cast_lightning, cast_fireball, cast_confuse, buff
+from item_functions import ITEM_FUNCTIONS
 
 
 class Item:
@@ -25,7 +25,7 @@ class Item:
         if json_data is None:
             return None
 
-        use_function = eval(json_data["use_function"]) if json_data["use_function"] is not None else None
+        use_function = ITEM_FUNCTIONS[json_data["use_function"]] if json_data["use_function"] is not None else None
         targeting = json_data["targeting"]
         targeting_message = Message.from_json(json_data["targeting_message"])
         function_kwargs = json_data["function_kwargs"]
@@ -5,16 +5,21 @@ from game_state import GameState
 from entity import Entity, EntityType
 
 
-def kill_player(player: "Entity"):
+def kill_player(player: "Entity", game_map: "GameMap"):
     player.glyph = ord('%')
     player.fg = (255, 0, 0)
+    game_map.update_entity(player)
 
     return Message("You died!", (255, 0, 0)), GameState.PLAYER_DEAD
 
 
-def kill_monster(monster: "Entity"):
+def kill_monster(monster: "Entity", game_map: "GameMap"):
     death_message = Message(f"{monster.name.capitalize()} is dead!", (255, 165, 0))
 
+    # A corpse has no stats for its buffs to change, so they are dropped rather than left to expire.
+    for buff in list(monster.buffs):
+        monster.remove_buff(buff)
+
     monster.glyph = ord('%')
     monster.fg = (255, 0, 0)
     monster.blocks = False
@@ -22,5 +27,8 @@ def kill_monster(monster: "Entity"):
     monster.ai = None
     monster.name = f"remains of {monster.name}"
     monster.entity_type = EntityType.CORPSE
+    game_map.update_entity(monster)
+    # The scheduler only notices a dead monster when its turn comes up, which never happens if it died asleep.
+    game_map.turns.remove(monster)
 
     return death_message
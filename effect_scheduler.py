@@ -0,0 +1,61 @@
+import heapq
+from itertools import count
+from typing import List, Tuple
+
+from components.buff import Buff
+
+
+class EffectScheduler:
+    """ Expires the buffs of every entity on a map on the turn they run out.
+
+    Expiry turns sit in a min-heap, so a turn only costs as much as the buffs that actually end on it. Entries whose
+    buff was removed, rescheduled or taken off the map are left in the heap and skipped when they come up.
+    """
+    def __init__(self):
+        # Turns played on this map. Buffs only count down while their entity is on a map that is being played.
+        self.turn = 0
+        self.queue: List[Tuple[int, int, Buff]] = []
+        # Breaks ties between buffs expiring on the same turn, in the order they were scheduled.
+        self.sequence = count()
+
+    def schedule(self, buff: Buff) -> None:
+        """ Starts counting down a buff's remaining turns from now. """
+        remaining = buff.num_turns
+        buff.scheduler = self
+        buff.expires_on = self.turn + remaining
+        heapq.heappush(self.queue, (buff.expires_on, next(self.sequence), buff))
+
+    def unschedule(self, buff: Buff) -> None:
+        """ Stops the countdown, leaving the buff with the turns it had left. """
+        if buff.scheduler is self:
+            remaining = buff.num_turns
+            buff.scheduler = None
+            buff.num_turns = remaining
+
+    def add_entity(self, entity: "Entity") -> None:
+        entity.effects = self
+        for buff in entity.buffs:
+            self.schedule(buff)
+
+    def remove_entity(self, entity: "Entity") -> None:
+        entity.effects = None
+        for buff in entity.buffs:
+            self.unschedule(buff)
+
+    def advance(self) -> List[Buff]:
+        """ Moves on to the next turn, expiring and returning the buffs that run out on it. """
+        self.turn += 1
+
+        expired = []
+        while self.queue and self.queue[0][0] <= self.turn:
+            expires_on, _, buff = heapq.heappop(self.queue)
+            if buff.scheduler is self and buff.expires_on == expires_on:
+                buff.scheduler = None
+                buff.num_turns = 0
+                buff.owner.remove_buff(buff)
+                expired.append(buff)
+
+        return expired
+
+    def __len__(self) -> int:
+        return len(self.queue)
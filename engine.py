@@ -1,13 +1,17 @@
-from typing import Dict
-from entity import Entity, get_blocking_entities
+from entity import Entity
 from game_messages import MessageLog, Message
 from game_state import GameState
 
-from render_functions import render_all, clear_all
+from render_functions import render_all, clear_all, RenderState
+from frame_clock import FrameClock, needs_redraw
 from event_handler import handle_event
 from loader_functions.data_loaders import save_game
 from death_functions import kill_monster, kill_player
 from map_objects.game_map import GameMap
+from map_objects.dungeon import Dungeon
+from map_objects.level_pregenerator import LevelPregenerator
+
+from typing import Dict
 
 import tcod
 import tcod.console
@@ -16,305 +20,404 @@ import tcod.event
 import settings as const
 
 
-# noinspection PyTypeChecker, PyUnresolvedReferences
-def play_game(player: Entity, dungeon: Dict, message_log: MessageLog, game_state: GameState,
-              root_console: tcod.console.Console, offscreen_console: tcod.console.Console,
-              viewport_console: tcod.console.Console, log_console: tcod.console.Console,
-              status_console: tcod.console.Console, entity_console: tcod.console.Console,
-              current_level: int, camera: "Camera"):
+class GameSession:
+    """ Everything the turn logic reads and changes, so turns can be played with or without a window. """
+    def __init__(self, player: Entity, dungeon: Dungeon, message_log: MessageLog, game_state: GameState,
+                 current_level: int, autosave_interval: int = const.AUTOSAVE_INTERVAL):
+        self.player = player
+        self.dungeon = dungeon
+        self.message_log = message_log
+        self.game_state = game_state
+        self.prev_game_state = game_state
+        self.current_level = current_level
 
-    mouse_tx, mouse_ty = 0, 0
+        self.targeting_item = None
+        self.box_text = ""
+        self.fov_recompute = True
+        # Set when the player changes level, so the UI knows to wipe the old level off the viewport.
+        self.level_changed = False
 
-    fov_recompute = True
-    prev_game_state = game_state
+        # Completed enemy phases, which is what the UI watches to know the map needs redrawing.
+        self.turn = 0
+        self.turns_since_save = 0
+        self.autosave_interval = autosave_interval
 
-    targeting_item = None
+    @property
+    def game_map(self) -> GameMap:
+        return self.dungeon[self.current_level]
 
-    root_console.clear()
-    offscreen_console.clear()
-    log_console.clear()
-    viewport_console.clear()
 
-    box_text = ""
-
-    while True:
-
-        if fov_recompute:
-            dungeon[current_level].fov_map.compute_fov(player.x, player.y, radius=const.FOV_RADIUS,
-                                                       light_walls=const.FOV_LIGHT_WALLS,
-                                                       algorithm=const.FOV_ALGO)
-
-        render_all(root_console, offscreen_console, viewport_console, status_console, log_console, entity_console,
-                   player, dungeon[current_level], mouse_tx, mouse_ty, fov_recompute, message_log, box_text, game_state,
-                   camera)
-
-        fov_recompute = False
-        clear_all(viewport_console, dungeon[current_level].entities, camera)
-        action = handle_event(tcod.event.get(), game_state)
-
-        exit_ = action.get("exit")
-        move = action.get("move")
-        wait = action.get("wait")
-        pickup = action.get("pickup")
-        show_inventory = action.get("show_inventory")
-        drop_inventory = action.get("drop_inventory")
-        inventory_index = action.get("inventory_index")
-        take_stairs = action.get("take_stairs")
-        level_up = action.get("level_up")
-        show_character_screen = action.get("show_character_screen")
-        fullscreen = action.get("fullscreen")
-        mouse = action.get("mouse")
-        left_click = action.get("left_click")
-        right_click = action.get("right_click")
-        test = action.get("test")
-
-        player_turn_results = []
-
-        if exit_:
-            if game_state in [GameState.SHOW_INVENTORY, GameState.DROP_INVENTORY, GameState.CHARACTER_SCREEN,
+def recompute_fov(session: GameSession) -> None:
+    if not session.fov_recompute:
+        return
+
+    game_map = session.game_map
+    game_map.compute_fov(session.player.x, session.player.y, radius=const.FOV_RADIUS,
+                         light_walls=const.FOV_LIGHT_WALLS, algorithm=const.FOV_ALGO)
+
+    # If a tile is visible, then it is now explored.
+    game_map.explored |= game_map.fov_map.fov
+    session.dungeon.mark_dirty(session.current_level)
+
+
+# noinspection PyTypeChecker, PyUnresolvedReferences
+def process_action(session: GameSession, action: Dict) -> bool:
+    """ Plays out one action from the player (or a script standing in for them), including the enemy phase it
+    triggers. Returns False once the game has been saved and should exit.
+    """
+    player = session.player
+    dungeon = session.dungeon
+    message_log = session.message_log
+
+    recompute_fov(session)
+
+    exit_ = action.get("exit")
+    move = action.get("move")
+    wait = action.get("wait")
+    pickup = action.get("pickup")
+    show_inventory = action.get("show_inventory")
+    drop_inventory = action.get("drop_inventory")
+    inventory_index = action.get("inventory_index")
+    take_stairs = action.get("take_stairs")
+    level_up = action.get("level_up")
+    show_character_screen = action.get("show_character_screen")
+    left_click = action.get("left_click")
+    right_click = action.get("right_click")
+    test = action.get("test")
+    scroll_log = action.get("scroll_log")
+
+    player_turn_results = []
+
+    if exit_:
+        if session.game_state in [GameState.SHOW_INVENTORY, GameState.DROP_INVENTORY, GameState.CHARACTER_SCREEN,
                               GameState.MESSAGE_BOX]:
-                game_state = prev_game_state
-            elif game_state == GameState.TARGETING:
-                player_turn_results.append({"targeting_cancelled": True})
+            session.game_state = session.prev_game_state
+        elif session.game_state == GameState.TARGETING:
+            player_turn_results.append({"targeting_cancelled": True})
+        else:
+            save_game(player, dungeon, message_log, session.game_state, session.current_level)
+            return False
+
+    if move and session.game_state == GameState.PLAYER_TURN:
+        dx, dy = move
+        dest_x = player.x + dx
+        dest_y = player.y + dy
+        if dungeon[session.current_level].is_walkable(dest_x, dest_y):
+            target = dungeon[session.current_level].get_blocking_entity_at(dest_x, dest_y)
+
+            if target:
+                attack_results = player.fighter.attack(target)
+                player_turn_results.extend(attack_results)
             else:
-                save_game(player, dungeon, message_log, game_state, current_level)
+                player.move(dx, dy, dungeon[session.current_level].entities, dungeon[session.current_level])
+
+                session.fov_recompute = True
+
+            session.game_state = GameState.ENEMY_TURN
+
+    elif wait:
+        session.game_state = GameState.ENEMY_TURN
+
+    elif pickup and session.game_state == GameState.PLAYER_TURN:
+        for entity in dungeon[session.current_level].get_entities_at(player.x, player.y):
+            if entity.item:
+                pickup_results = player.inventory.add_item(entity)
+                player_turn_results.extend(pickup_results)
+
                 break
+        else:
+            message_log.add_message(Message("There is nothing here to pick up.", tcod.yellow))
+
+    elif test and session.game_state == GameState.PLAYER_TURN:
+        # message_log.add_message(Message("This is a super-long message for testing purposes, unless you're me you should definitely not be seeing it. It's really unnecessarily long.", tcod.yellow))
+        session.prev_game_state = session.game_state
+        session.game_state = GameState.MESSAGE_BOX
+        session.box_text = "This is a testing message box."
+
+    if show_inventory:
+        if session.game_state == GameState.SHOW_INVENTORY:
+            session.game_state = session.prev_game_state
+        else:
+            session.prev_game_state = session.game_state
+            session.game_state = GameState.SHOW_INVENTORY
+
+    if drop_inventory:
+        if session.game_state == GameState.DROP_INVENTORY:
+            session.game_state = session.prev_game_state
+        else:
+            session.prev_game_state = session.game_state
+            session.game_state = GameState.DROP_INVENTORY
+
+    if inventory_index is not None and session.prev_game_state != GameState.PLAYER_DEAD and inventory_index < len(
+            player.inventory.items):
+        item = player.inventory.items[inventory_index]
+
+        if session.game_state == GameState.SHOW_INVENTORY:
+            player_turn_results.extend(player.inventory.use(item, entities=dungeon[session.current_level].entities,
+                                                            fov_map=dungeon[session.current_level].fov_map,
+                                                            game_map=dungeon[session.current_level]))
+        elif session.game_state == GameState.DROP_INVENTORY:
+            player_turn_results.extend(player.inventory.drop_item(item))
+
+    if take_stairs and session.game_state == GameState.PLAYER_TURN:
+        for entity in dungeon[session.current_level].get_entities_at(player.x, player.y):
+            if entity.stairs:
+                dungeon[session.current_level].remove_entity(player)
+
+                if entity.stairs.direction == 1:
+                    session.current_level += 1
+                    next_level = dungeon.get(session.current_level)
+                    if next_level is None:
+                        new_map = dungeon.generate_level(session.current_level, player)
+                        new_map.add_entity(player)
+                        player.fighter.heal(player.fighter.max_hp // 2)
+                        message_log.add_message(
+                            Message('You take a moment to rest, and recover your strength.', tcod.light_violet))
+                    else:
+                        player.x = dungeon[session.current_level].start_x
+                        player.y = dungeon[session.current_level].start_y
+                        dungeon[session.current_level].add_entity(player)
+                elif entity.stairs.direction == -1:
+                    session.current_level -= 1
+                    player.x = dungeon[session.current_level].end_x
+                    player.y = dungeon[session.current_level].end_y
+                    dungeon[session.current_level].add_entity(player)
+
+                dungeon.pregenerate(session.current_level + 1)
+
+                session.fov_recompute = True
+                session.level_changed = True
+
+                if session.autosave_interval:
+                    save_game(player, dungeon, message_log, session.game_state, session.current_level)
+                    session.turns_since_save = 0
 
-        if fullscreen:
-            tcod.console_set_fullscreen(not tcod.console_is_fullscreen())
+                break
+        else:
+            message_log.add_message(Message('There are no stairs here.', tcod.yellow))
+
+    if level_up:
+        if level_up == "hp":
+            player.fighter.base_max_hp += 20
+            player.fighter.hp += 20
+        elif level_up == "str":
+            player.fighter.base_power += 1
+        elif level_up == "def":
+            player.fighter.base_defense += 1
+
+        session.game_state = session.prev_game_state
+
+    if show_character_screen:
+        session.prev_game_state = session.game_state
+        session.game_state = GameState.CHARACTER_SCREEN
+
+    if scroll_log:
+        # Scrolls a page at a time, keeping one line of the previous page for context.
+        session.message_log.scroll(scroll_log * (session.message_log.height - 1))
+
+    if session.game_state == GameState.TARGETING:
+        if left_click:
+            target_x, target_y = left_click
+
+            item_use_results = player.inventory.use(session.targeting_item, entities=dungeon[session.current_level].entities,
+                                                    fov_map=dungeon[session.current_level].fov_map,
+                                                    game_map=dungeon[session.current_level],
+                                                    target_x=target_x, target_y=target_y)
+            player_turn_results.extend(item_use_results)
+        elif right_click:
+            player_turn_results.append({"targeting_cancelled": True})
+
+    for player_turn_result in player_turn_results:
+        message = player_turn_result.get("message")
+        dead_entity = player_turn_result.get("dead")
+        item_added = player_turn_result.get("item_added")
+        item_consumed = player_turn_result.get("consumed")
+        item_dropped = player_turn_result.get("item_dropped")
+        equip = player_turn_result.get("equip")
+        targeting = player_turn_result.get("targeting")
+        targeting_cancelled = player_turn_result.get("targeting_cancelled")
+        xp = player_turn_result.get("xp")
+
+        if message is not None:
+            message_log.add_message(message)
+
+        if dead_entity is not None:
+            if dead_entity == player:
+                message, session.game_state = kill_player(dead_entity, dungeon[session.current_level])
+            else:
+                message = kill_monster(dead_entity, dungeon[session.current_level])
 
-        if mouse:
-            mouse_tx, mouse_ty = mouse
+            message_log.add_message(message)
 
-        if move and game_state == GameState.PLAYER_TURN:
-            dx, dy = move
-            dest_x = player.x + dx
-            dest_y = player.y + dy
-            if dungeon[current_level].is_walkable(dest_x, dest_y):
-                target = get_blocking_entities(dungeon[current_level].entities, dest_x, dest_y)
+        if item_added:
+            dungeon[session.current_level].remove_entity(item_added)
 
-                if target:
-                    attack_results = player.fighter.attack(target)
-                    player_turn_results.extend(attack_results)
-                else:
-                    player.move(dx, dy, dungeon[current_level].entities, dungeon[current_level])
+            session.game_state = GameState.ENEMY_TURN
 
-                    fov_recompute = True
+        if item_consumed:
+            session.game_state = GameState.ENEMY_TURN
 
-                for buff in player.buffs:
-                    player_turn_results.extend(buff.tick_down())
+        if item_dropped:
+            dungeon[session.current_level].add_entity(item_dropped)
 
-                game_state = GameState.ENEMY_TURN
+            session.game_state = GameState.ENEMY_TURN
 
-        elif wait:
-            for buff in player.buffs:
-                player_turn_results.extend(buff.tick_down())
-            game_state = GameState.ENEMY_TURN
+        if equip:
+            equip_results = player.equipment.toggle_equip(equip)
 
-        elif pickup and game_state == GameState.PLAYER_TURN:
-            for entity in dungeon[current_level].entities:
-                if entity.item and entity.x == player.x and entity.y == player.y:
-                    pickup_results = player.inventory.add_item(entity)
-                    player_turn_results.extend(pickup_results)
+            for equip_result in equip_results:
+                equipped = equip_result.get("equipped")
+                dequipped = equip_result.get("dequipped")
 
-                    break
-            else:
-                message_log.add_message(Message("There is nothing here to pick up.", tcod.yellow))
+                if equipped:
+                    message_log.add_message(Message(f"You equipped the {equipped.name}", ))
 
-        elif test and game_state == GameState.PLAYER_TURN:
-            # message_log.add_message(Message("This is a super-long message for testing purposes, unless you're me you should definitely not be seeing it. It's really unnecessarily long.", tcod.yellow))
-            prev_game_state = game_state
-            game_state = GameState.MESSAGE_BOX
-            box_text = "This is a testing message box."
+                if dequipped:
+                    message_log.add_message(Message(f"You dequipped the {dequipped.name}", ))
 
-        if show_inventory:
-            if game_state == GameState.SHOW_INVENTORY:
-                game_state = prev_game_state
-            else:
-                prev_game_state = game_state
-                game_state = GameState.SHOW_INVENTORY
+            session.game_state = GameState.ENEMY_TURN
 
-        if drop_inventory:
-            if game_state == GameState.DROP_INVENTORY:
-                game_state = prev_game_state
-            else:
-                prev_game_state = game_state
-                game_state = GameState.DROP_INVENTORY
-
-        if inventory_index is not None and prev_game_state != GameState.PLAYER_DEAD and inventory_index < len(
-                player.inventory.items):
-            item = player.inventory.items[inventory_index]
-
-            if game_state == GameState.SHOW_INVENTORY:
-                player_turn_results.extend(player.inventory.use(item, entities=dungeon[current_level].entities,
-                                                                fov_map=dungeon[current_level].fov_map))
-            elif game_state == GameState.DROP_INVENTORY:
-                player_turn_results.extend(player.inventory.drop_item(item))
-
-        if take_stairs and game_state == GameState.PLAYER_TURN:
-            for entity in dungeon[current_level].entities:
-                if entity.stairs and entity.x == player.x and entity.y == player.y:
-                    if entity.stairs.direction == 1:
-                        current_level += 1
-                        next_level = dungeon.get(current_level)
-                        if next_level is None:
-                            new_map = GameMap(const.MAP_WIDTH, const.MAP_HEIGHT, dungeon_level=current_level)
-                            new_map.make_map(const.MAX_ROOMS, const.ROOM_MIN_SIZE, const.ROOM_MAX_SIZE,
-                                             const.MAP_WIDTH, const.MAP_HEIGHT, player)
-                            new_map.entities.append(player)
-                            dungeon.update({current_level: new_map})
-                            player.fighter.heal(player.fighter.max_hp // 2)
-                            message_log.add_message(
-                                Message('You take a moment to rest, and recover your strength.', tcod.light_violet))
+        if targeting:
+            session.prev_game_state = GameState.PLAYER_TURN
+            session.game_state = GameState.TARGETING
+
+            session.targeting_item = targeting
+
+            message_log.add_message(session.targeting_item.item.targeting_message)
+
+        if targeting_cancelled:
+            session.game_state = session.prev_game_state
+
+            message_log.add_message(Message("Targeting cancelled."))
+
+        if xp:
+            leveled_up = player.level.add_xp(xp)
+            message_log.add_message(Message(f"You gain {xp} experience points!"))
+
+            if leveled_up:
+                message_log.add_message(Message(
+                    f"Your battle skills grow stronger! You reached level {player.level.current_level}!",
+                    tcod.yellow))
+                session.prev_game_state = session.game_state
+                session.game_state = GameState.LEVEL_UP
+
+    if session.game_state == GameState.ENEMY_TURN:
+        game_map = dungeon[session.current_level]
+
+        # The player's turn is spent, so buffs that run out on it end before the monsters act.
+        for buff in game_map.effects.advance():
+            expire_results = buff.expire()
+            if buff.owner == player:
+                for expire_result in expire_results:
+                    message_log.add_message(expire_result["message"])
+
+        for entity in game_map.turns.phase(player):
+            if entity.ai:
+                enemy_turn_results = entity.ai.take_turn(player, game_map, game_map.entities)
+
+                for enemy_turn_result in enemy_turn_results:
+                    message = enemy_turn_result.get("message")
+                    dead_entity = enemy_turn_result.get("dead")
+
+                    if message:
+                        message_log.add_message(message)
+
+                    if dead_entity:
+                        if dead_entity == player:
+                            message, session.game_state = kill_player(dead_entity, game_map)
                         else:
-                            player.x = dungeon[current_level].start_x
-                            player.y = dungeon[current_level].start_y
-                    elif entity.stairs.direction == -1:
-                        current_level -= 1
-                        player.x = dungeon[current_level].end_x
-                        player.y = dungeon[current_level].end_y
+                            message = kill_monster(dead_entity, game_map)
 
-                    fov_recompute = True
-                    viewport_console.clear()
+                        message_log.add_message(message)
 
+                        if session.game_state == GameState.PLAYER_DEAD:
+                            break
+                if session.game_state == GameState.PLAYER_DEAD:
                     break
-            else:
-                message_log.add_message(Message('There are no stairs here.', tcod.yellow))
+            if session.game_state == GameState.PLAYER_DEAD:
+                break
+        else:
+            session.game_state = GameState.PLAYER_TURN
 
-        if level_up:
-            if level_up == "hp":
-                player.fighter.base_max_hp += 20
-                player.fighter.hp += 20
-            elif level_up == "str":
-                player.fighter.base_power += 1
-            elif level_up == "def":
-                player.fighter.base_defense += 1
+        dungeon.mark_dirty(session.current_level)
+        session.turn += 1
+        session.turns_since_save += 1
 
-            game_state = prev_game_state
-
-        if show_character_screen:
-            prev_game_state = game_state
-            game_state = GameState.CHARACTER_SCREEN
-
-        if game_state == GameState.TARGETING:
-            if left_click:
-                target_x, target_y = left_click
-
-                item_use_results = player.inventory.use(targeting_item, entities=dungeon[current_level].entities,
-                                                        fov_map=dungeon[current_level].fov_map,
-                                                        target_x=target_x, target_y=target_y)
-                player_turn_results.extend(item_use_results)
-            elif right_click:
-                player_turn_results.append({"targeting_cancelled": True})
-
-        for player_turn_result in player_turn_results:
-            message = player_turn_result.get("message")
-            dead_entity = player_turn_result.get("dead")
-            item_added = player_turn_result.get("item_added")
-            item_consumed = player_turn_result.get("consumed")
-            item_dropped = player_turn_result.get("item_dropped")
-            equip = player_turn_result.get("equip")
-            targeting = player_turn_result.get("targeting")
-            targeting_cancelled = player_turn_result.get("targeting_cancelled")
-            xp = player_turn_result.get("xp")
-
-            if message is not None:
-                message_log.add_message(message)
-
-            if dead_entity is not None:
-                if dead_entity == player:
-                    message, game_state = kill_player(dead_entity)
-                else:
-                    message = kill_monster(dead_entity)
-
-                message_log.add_message(message)
-
-            if item_added:
-                dungeon[current_level].entities.remove(item_added)
-
-                for buff in player.buffs:
-                    player_turn_results.extend(buff.tick_down())
-                game_state = GameState.ENEMY_TURN
-
-            if item_consumed:
-                for buff in player.buffs:
-                    player_turn_results.extend(buff.tick_down())
-                game_state = GameState.ENEMY_TURN
-
-            if item_dropped:
-                dungeon[current_level].entities.append(item_dropped)
-
-                for buff in player.buffs:
-                    player_turn_results.extend(buff.tick_down())
-                game_state = GameState.ENEMY_TURN
-
-            if equip:
-                equip_results = player.equipment.toggle_equip(equip)
-
-                for equip_result in equip_results:
-                    equipped = equip_result.get("equipped")
-                    dequipped = equip_result.get("dequipped")
-
-                    if equipped:
-                        message_log.add_message(Message(f"You equipped the {equipped.name}", ))
-
-                    if dequipped:
-                        message_log.add_message(Message(f"You dequipped the {dequipped.name}", ))
-
-                for buff in player.buffs:
-                    player_turn_results.extend(buff.tick_down())
-                game_state = GameState.ENEMY_TURN
-
-            if targeting:
-                prev_game_state = GameState.PLAYER_TURN
-                game_state = GameState.TARGETING
-
-                targeting_item = targeting
-
-                message_log.add_message(targeting_item.item.targeting_message)
-
-            if targeting_cancelled:
-                game_state = prev_game_state
-
-                message_log.add_message(Message("Targeting cancelled."))
-
-            if xp:
-                leveled_up = player.level.add_xp(xp)
-                message_log.add_message(Message(f"You gain {xp} experience points!"))
-
-                if leveled_up:
-                    message_log.add_message(Message(
-                        f"Your battle skills grow stronger! You reached level {player.level.current_level}!",
-                        tcod.yellow))
-                    prev_game_state = game_state
-                    game_state = GameState.LEVEL_UP
+        if session.autosave_interval and session.turns_since_save >= session.autosave_interval:
+            save_game(player, dungeon, message_log, session.game_state, session.current_level)
+            session.turns_since_save = 0
 
-        if game_state == GameState.ENEMY_TURN:
-            for entity in dungeon[current_level].entities:
-                if entity.ai:
-                    enemy_turn_results = entity.ai.take_turn(player, dungeon[current_level],
-                                                             dungeon[current_level].entities)
-
-                    for enemy_turn_result in enemy_turn_results:
-                        message = enemy_turn_result.get("message")
-                        dead_entity = enemy_turn_result.get("dead")
-
-                        if message:
-                            message_log.add_message(message)
-
-                        if dead_entity:
-                            if dead_entity == player:
-                                message, game_state = kill_player(dead_entity)
-                            else:
-                                message = kill_monster(dead_entity)
-
-                            message_log.add_message(message)
+    return True
 
-                            if game_state == GameState.PLAYER_DEAD:
-                                break
-                    if game_state == GameState.PLAYER_DEAD:
-                        break
-                if game_state == GameState.PLAYER_DEAD:
-                    break
-            else:
-                game_state = GameState.PLAYER_TURN
+
+# noinspection PyTypeChecker, PyUnresolvedReferences
+def play_game(player: Entity, dungeon: Dungeon, message_log: MessageLog, game_state: GameState,
+              root_console: tcod.console.Console, offscreen_console: tcod.console.Console,
+              viewport_console: tcod.console.Console, log_console: tcod.console.Console,
+              status_console: tcod.console.Console, entity_console: tcod.console.Console,
+              current_level: int, camera: "Camera"):
+
+    mouse_tx, mouse_ty = 0, 0
+
+    root_console.clear()
+    offscreen_console.clear()
+    log_console.clear()
+    viewport_console.clear()
+
+    session = GameSession(player, dungeon, message_log, game_state, current_level)
+    render_state = RenderState()
+    rendered_turn = session.turn
+    clock = FrameClock()
+
+    if const.PREGENERATE_LEVELS:
+        dungeon.pregenerator = LevelPregenerator(dungeon.streams)
+        dungeon.pregenerate(current_level + 1)
+
+    try:
+        while True:
+            # Render tick: draws whatever changed since the last one, if anything.
+            fov_recompute = session.fov_recompute
+            recompute_fov(session)
+
+            if session.turn != rendered_turn:
+                rendered_turn = session.turn
+                render_state.mark_dirty(viewport=True, entities=True)
+
+            rendered = render_all(root_console, offscreen_console, viewport_console, status_console, log_console,
+                                  entity_console, player, session.game_map, mouse_tx, mouse_ty, fov_recompute,
+                                  message_log, session.box_text, session.game_state, camera, render_state)
+
+            session.fov_recompute = False
+            if rendered:
+                clear_all(viewport_console, session.game_map, camera)
+
+            # Enemy turns play out without input, so the loop only sleeps on the player's turn.
+            simulating = session.game_state == GameState.ENEMY_TURN
+            events = clock.wait(render_state.animating or simulating)
+            if needs_redraw(events):
+                render_state.mark_all_dirty()
+
+            action = handle_event(events, session.game_state)
+            if not action and not simulating:
+                continue
+
+            fullscreen = action.get("fullscreen")
+            mouse = action.get("mouse")
+
+            if fullscreen:
+                tcod.console_set_fullscreen(not tcod.console_is_fullscreen())
+
+            if mouse:
+                mouse_tx, mouse_ty = mouse
+
+            # Simulation tick: plays out the action, if it is one the game itself cares about.
+            if not process_action(session, action):
+                break
+
+            if session.level_changed:
+                session.level_changed = False
+                viewport_console.clear()
+    finally:
+        if dungeon.pregenerator is not None:
+            dungeon.pregenerator.shutdown()
+            dungeon.pregenerator = None
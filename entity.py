@@ -1,4 +1,4 @@
-from typing import Tuple, List, Any, Dict, Union
+from typing import Tuple, List, Any, Dict
 from components.fighter import Fighter
 from components.item import Item
 from components.inventory import Inventory
@@ -8,6 +8,7 @@ from components.level import Level
 from components.equippable import Equippable
 from components.equipment import Equipment
 from components.buff import Buff
+from map_objects.entity_store import EntityColumn
 import math
 from enum import Enum, auto
 
@@ -20,13 +21,38 @@ class EntityType(Enum):
     PLAYER = auto()
 
 
+ENTITY_TYPES = {entity_type.value: entity_type for entity_type in EntityType}
+
+
 class Entity:
-    """ A generic entity to represent the player, npcs, items, etc. """
+    """ A generic entity to represent the player, npcs, items, etc.
+
+    The hot fields (position, looks, blocks, type) live in a row of the map's EntityStore while the entity is on a
+    map, so whole columns of them can be scanned at once.
+    """
+    __slots__ = ("name", "bg", "_fighter", "_ai", "item", "inventory", "stairs", "level", "equipment", "equippable",
+                 "buffs", "effects", "store", "row", "_x", "_y", "_glyph", "_fg", "_blocks", "_layer")
+
+    x = EntityColumn("x")
+    y = EntityColumn("y")
+    glyph = EntityColumn("glyph")
+    fg = EntityColumn("fg", decode=lambda fg: (int(fg[0]), int(fg[1]), int(fg[2])))
+    blocks = EntityColumn("blocks", decode=bool)
+    entity_type = EntityColumn("layer", decode=lambda layer: ENTITY_TYPES[int(layer)],
+                               encode=lambda entity_type: entity_type.value)
+
     def __init__(self, name: str, entity_type: EntityType, x: int, y: int, glyph: int,
                  fg: Tuple[int, int, int] = (255, 255, 255), bg: Tuple[int, int, int] = (0, 0, 0), blocks: bool = False,
                  fighter: Fighter = None, ai: Any = None, item: Item = None, inventory: Inventory = None,
                  stairs: Stairs = None, level: Level = None, equipment: Equipment = None,
                  equippable: Equippable = None):
+        self.store = None
+        self.row = -1
+        # The EffectScheduler of the map the entity is on, which counts its buffs down.
+        self.effects = None
+        self._fighter = None
+        self._ai = None
+
         self.name = name
         self.entity_type = entity_type
         self.x = x
@@ -45,12 +71,6 @@ class Entity:
         self.equippable = equippable
         self.buffs = []
 
-        if self.fighter:
-            self.fighter.owner = self
-
-        if self.ai:
-            self.ai.owner = self
-
         if self.item:
             self.item.owner = self
 
@@ -74,6 +94,30 @@ class Entity:
                 self.item = item
                 self.item.owner = self
 
+    @property
+    def fighter(self) -> Fighter:
+        return self._fighter
+
+    @fighter.setter
+    def fighter(self, fighter: Fighter) -> None:
+        self._fighter = fighter
+        if fighter is not None:
+            fighter.owner = self
+        if self.store is not None:
+            self.store.update_fighter(self)
+
+    @property
+    def ai(self) -> Any:
+        return self._ai
+
+    @ai.setter
+    def ai(self, ai: Any) -> None:
+        self._ai = ai
+        if ai is not None:
+            ai.owner = self
+        if self.store is not None:
+            self.store.update_fighter(self)
+
     def to_json(self) -> Dict:
         json_data = {
             "name": self.name,
@@ -139,8 +183,7 @@ class Entity:
 
         for buff in buffs:
             buff.owner = entity
-
-        entity.buffs = buffs
+            entity.add_buff(buff)
 
         return entity
 
@@ -149,11 +192,13 @@ class Entity:
         if ignore_blocking:
             self.x += dx
             self.y += dy
+            game_map.update_entity(self)
         else:
             if (game_map.is_walkable(self.x + dx, self.y + dy) and
-                    not get_blocking_entities(entities, self.x + dx, self.y + dy)):
+                    not game_map.get_blocking_entity_at(self.x + dx, self.y + dy)):
                 self.x += dx
                 self.y += dy
+                game_map.update_entity(self)
 
     def move_towards(self, target_x: int, target_y: int, game_map: "GameMap", entities: List["Entity"]):
         dx = target_x - self.x
@@ -165,14 +210,22 @@ class Entity:
         dy = int(round(dy / distance))
 
         if (game_map.is_walkable(self.x + dx, self.y + dy) and
-                not get_blocking_entities(entities, self.x + dx, self.y + dy)):
+                not game_map.get_blocking_entity_at(self.x + dx, self.y + dy)):
             self.move(dx, dy, entities, game_map)
 
     def add_buff(self, buff: Buff):
         self.buffs.append(buff)
+        if self.effects is not None:
+            self.effects.schedule(buff)
+        if self.fighter:
+            self.fighter.invalidate_stats()
 
     def remove_buff(self, buff: Buff):
         self.buffs.remove(buff)
+        if self.effects is not None:
+            self.effects.unschedule(buff)
+        if self.fighter:
+            self.fighter.invalidate_stats()
 
     def distance_to(self, other) -> float:
         dx = other.x - self.x
@@ -183,10 +236,3 @@ class Entity:
     def distance(self, tx, ty):
         return math.sqrt((tx - self.x) ** 2 + (ty - self.y) ** 2)
 
-
-def get_blocking_entities(entities: List, dest_x: int, dest_y: int) -> Union[Entity, None]:
-    for entity in entities:
-        if entity.blocks and entity.x == dest_x and entity.y == dest_y:
-            return entity
-
-    return None
@@ -105,6 +105,10 @@ def handle_player_turn_keys(key: tcod.event.KeyboardEvent) -> Dict:
         return {"wait": True}
     elif key.sym == tcod.event.K_BACKQUOTE:
         return {"test": True}
+    elif key.sym == tcod.event.K_PAGEUP:
+        return {"scroll_log": 1}
+    elif key.sym == tcod.event.K_PAGEDOWN:
+        return {"scroll_log": -1}
 
     if key.sym == tcod.event.K_RETURN and key.mod & tcod.event.KMOD_ALT:
         # Alt+Enter: toggle full screen
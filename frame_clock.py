@@ -0,0 +1,49 @@
+import time
+from typing import List
+
+import tcod.event
+
+import settings as const
+
+# Window events after which the last frame has to be presented again, by tcod's event type names.
+REDRAW_EVENTS = ("WindowExposed", "WindowResized", "WindowRestored", "WindowMaximized")
+
+
+class FrameClock:
+    """ Paces a game loop: it sleeps until input arrives when nothing is animating, and wakes up at most frame_cap
+    times a second when something is.
+    """
+    def __init__(self, frame_cap: int = const.FRAME_CAP, idle_timeout: float = const.IDLE_TIMEOUT):
+        self.frame_time = 1.0 / frame_cap if frame_cap else 0.0
+        self.idle_timeout = idle_timeout
+        self.next_frame = time.perf_counter()
+
+    def wait(self, animating: bool = False) -> List:
+        """ Returns the pending input events, waiting for some if there are none.
+
+        Input is returned as soon as it arrives. While animating, the wait also ends when the next frame is due.
+        """
+        if not animating:
+            return list(tcod.event.wait(self.idle_timeout))
+
+        if not self.frame_time:
+            return list(tcod.event.get())
+
+        now = time.perf_counter()
+        if self.next_frame <= now:
+            # Frames that are already late are dropped rather than rushed through to catch up.
+            missed = int((now - self.next_frame) / self.frame_time)
+            self.next_frame += self.frame_time * (missed + 1)
+
+        return list(tcod.event.wait(self.next_frame - now))
+
+
+def needs_redraw(events: List) -> bool:
+    """ Returns True if any of the events means the window lost what was drawn on it.
+
+    >>> needs_redraw([tcod.event.WindowEvent(type="WindowExposed", window_id=0, data=(0, 0))])
+    True
+    >>> needs_redraw([tcod.event.WindowEvent(type="WindowMoved", window_id=0, data=(0, 0))])
+    False
+    """
+    return any(isinstance(event, tcod.event.WindowEvent) and event.type in REDRAW_EVENTS for event in events)
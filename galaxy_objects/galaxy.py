@@ -1,3 +1,50 @@
+from collections.abc import Mapping
+from math import pi, sqrt
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from galaxy_objects.star import Star, generate_stars, star_dtype
+from galaxy_objects.star_grid import StarGrid
+from galaxy_objects.star_system import StarSystem
+
+# How far round the galaxy an arm winds from the core to the rim, in radians.
+ARM_TWIST = 3 * pi
+# Standard deviation of a star's angle from the center line of its arm, in radians.
+ARM_SPREAD = 0.35
+# Share of stars in the central bulge rather than the arms.
+BULGE_SHARE = 0.15
+# Average number of star systems per grid cell.
+SYSTEMS_PER_CELL = 4
+
+
+class StarSystems(Mapping):
+    """ Maps system ids to StarSystems, only building the objects for systems that are actually looked at. """
+    def __init__(self, galaxy: "Galaxy"):
+        self.galaxy = galaxy
+        self.loaded: Dict[int, StarSystem] = {}
+
+    def __getitem__(self, system_id: int) -> StarSystem:
+        star_system = self.loaded.get(system_id)
+
+        if star_system is None:
+            if not 0 <= system_id < len(self):
+                raise KeyError(system_id)
+
+            galaxy = self.galaxy
+            star_system = StarSystem(system_id, float(galaxy.x[system_id]), float(galaxy.y[system_id]),
+                                     [Star(galaxy.stars, system_id)])
+            self.loaded[system_id] = star_system
+
+        return star_system
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self.galaxy.x)
+
+
 class Galaxy:
     def __init__(self, width: int, height: int, density: float):
         self.width = width
@@ -5,5 +52,52 @@ class Galaxy:
         self.density = density
         self.star_systems = {}
 
-    def generate_galaxy(self):
-        pass
+        self.x = np.zeros(0, dtype=np.float32)
+        self.y = np.zeros(0, dtype=np.float32)
+        self.stars = np.zeros(0, dtype=star_dtype)
+        self.grid = None
+
+    def generate_galaxy(self, rng: np.random.Generator, arms: int = 2):
+        """ Scatters width * height * density star systems over a spiral galaxy, each with one star.
+
+        rng is normally RandomStreams.generator("galaxy"), so the same game seed always gives the same galaxy.
+        """
+
+        count = int(self.width * self.height * self.density)
+        self.x, self.y = self.spiral_positions(count, arms, rng)
+        self.stars = generate_stars(count, rng)
+
+        cell_size = max(sqrt(self.width * self.height * SYSTEMS_PER_CELL / max(count, 1)), 1.0)
+        self.grid = StarGrid(self.x, self.y, self.width, self.height, cell_size)
+        self.star_systems = StarSystems(self)
+
+    def spiral_positions(self, count: int, arms: int, rng: np.random.Generator):
+        """ Places count points in arms that wind out from the center, thinning out towards the rim. """
+        max_radius = 0.5
+        radius = np.empty(count)
+        pending = np.arange(count)
+        # Redraw the few points an exponential falloff throws past the rim.
+        while len(pending):
+            radius[pending] = rng.exponential(max_radius / 3, size=len(pending))
+            pending = pending[radius[pending] >= max_radius]
+
+        arm = rng.integers(0, max(arms, 1), size=count)
+        angle = arm * (2 * pi / max(arms, 1)) + radius / max_radius * ARM_TWIST + rng.normal(0, ARM_SPREAD, count)
+        bulge = rng.random(count) < BULGE_SHARE
+        angle[bulge] = rng.uniform(0, 2 * pi, size=int(bulge.sum()))
+
+        x = ((0.5 + radius * np.cos(angle)) * self.width).astype(np.float32)
+        y = ((0.5 + radius * np.sin(angle)) * self.height).astype(np.float32)
+
+        return x, y
+
+    def systems_in_view(self, x1: float, y1: float, x2: float, y2: float) -> List[StarSystem]:
+        return [self.star_systems[int(i)] for i in self.grid.in_rect(x1, y1, x2, y2)]
+
+    def systems_within(self, x: float, y: float, radius: float) -> List[StarSystem]:
+        return [self.star_systems[int(i)] for i in self.grid.within_radius(x, y, radius)]
+
+    def nearest_system(self, x: float, y: float) -> StarSystem:
+        index = self.grid.nearest(x, y)
+
+        return self.star_systems[index] if index >= 0 else None
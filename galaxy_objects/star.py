@@ -1,9 +1,8 @@
 from enum import Enum
-from random import choice, randint, uniform, triangular
-from random_utils import random_choice_from_dict
+from random_utils import WeightedSampler
 import numpy as np
-from math import sqrt, pi, log10
-from typing import Tuple
+from math import pi, log10
+from typing import Tuple, Union
 
 # Sun's luminosity: 3.827E+26 watts
 # Stefan-Boltzmann Law: L = 4 * pi * (R^2) * (5.670E-8) * (T^4)
@@ -43,139 +42,180 @@ weighted_chance = {
     StellarClass.CLASS_D: 12
                   }
 
+stellar_class_sampler = WeightedSampler(weighted_chance)
+
+
+SOLAR_LUMINOSITY = 3.827E+26
+STEFAN_BOLTZMANN = 5.670E-8
+
+STELLAR_CLASSES = stellar_class_sampler.choices
+LUMINOSITY_CLASSES = list(LuminosityClass)
+
+# Upper bolometric magnitude of each luminosity class from IA_PLUS to V; anything dimmer is VI.
+BOLOMETRIC_LIMITS = np.array([-8, -7, -5, -2, 0, 2.5, 5])
+
+# Per stellar class: temperature range (K) and the power of ten it is rounded to, mass range (Msol), luminosity
+# range (Lsol) and the decimals it is rounded to, and color. Integer luminosities are drawn from ranges widened by
+# half a unit so rounding gives each whole number an equal chance. White dwarfs have their mass drawn from a
+# triangular distribution and their luminosity worked out from it, so those columns are unused.
+CLASS_PARAMETERS = {
+    StellarClass.CLASS_O: ((30000, 55000, 3), (16, 100), (29999.5, 1000000.5, 0), (128, 128, 255)),
+    StellarClass.CLASS_B: ((10000, 30000, 2), (2.1, 16), (24.5, 30000.5, 0), (64, 64, 255)),
+    StellarClass.CLASS_A: ((7500, 10000, 2), (1.4, 2.1), (4.5, 25.5, 0), (0, 0, 255)),
+    StellarClass.CLASS_F: ((6000, 7500, 2), (1.04, 1.4), (1.5, 5, 0), (255, 255, 128)),
+    StellarClass.CLASS_G: ((5200, 6000, 2), (0.8, 1.04), (0.6, 1.5, 2), (255, 255, 0)),
+    StellarClass.CLASS_K: ((3700, 5200, 0), (0.45, 0.8), (0.08, 0.6, 2), (255, 185, 115)),
+    StellarClass.CLASS_M: ((2400, 3700, 2), (0.08, 0.45), (0.02, 0.04, 2), (255, 127, 0)),
+    StellarClass.CLASS_D: ((3900, 5000, 2), (0, 0), (0, 0, 0), (255, 255, 255))
+}
+
+_temperatures, _masses, _luminosities, _colors = zip(*(CLASS_PARAMETERS[c] for c in STELLAR_CLASSES))
+TEMPERATURE_MIN, TEMPERATURE_MAX, TEMPERATURE_ROUNDING = np.array(_temperatures).T
+MASS_MIN, MASS_MAX = np.array(_masses).T
+LUMINOSITY_MIN, LUMINOSITY_MAX, LUMINOSITY_DECIMALS = np.array(_luminosities).T
+CLASS_COLORS = np.array(_colors, dtype=np.uint8)
+WHITE_DWARF = STELLAR_CLASSES.index(StellarClass.CLASS_D)
+
+star_dtype = np.dtype([("stellar_class", np.int8), ("mass", np.float64), ("luminosity", np.float64),
+                       ("temperature", np.int32), ("temperature_class", np.int8), ("luminosity_class", np.int8),
+                       ("h_inner", np.float64), ("h_outer", np.float64), ("color", np.uint8, 3)])
+
+
+def generate_stars(count: int, rng: np.random.Generator) -> np.ndarray:
+    """ Generates count stars at once as a star_dtype array.
+
+    Classes index STELLAR_CLASSES and LUMINOSITY_CLASSES; white dwarfs, which have neither a temperature nor a
+    luminosity class, store -1. Luminosity is in watts.
+    """
+    stars = np.zeros(count, dtype=star_dtype)
+    classes = stellar_class_sampler.sample_indices(count, rng)
+    dwarfs = classes == WHITE_DWARF
+    dwarf_count = int(dwarfs.sum())
+    stars["stellar_class"] = classes
+    stars["color"] = CLASS_COLORS[classes]
+
+    temperature_min = TEMPERATURE_MIN[classes].astype(np.int64)
+    temperature_max = TEMPERATURE_MAX[classes].astype(np.int64)
+    rounding = 10.0 ** TEMPERATURE_ROUNDING[classes]
+    temperature = rng.integers(temperature_min, temperature_max, endpoint=True)
+    temperature = np.round(temperature / rounding) * rounding
+    stars["temperature"] = temperature
+
+    mass = rng.uniform(MASS_MIN[classes], MASS_MAX[classes])
+    mass[dwarfs] = rng.triangular(0.17, 0.6, 1.0, size=dwarf_count)
+    mass = np.round(mass, 2)
+    stars["mass"] = mass
+
+    decimals = 10.0 ** LUMINOSITY_DECIMALS[classes]
+    solar_luminosity = np.round(rng.uniform(LUMINOSITY_MIN[classes], LUMINOSITY_MAX[classes]) * decimals) / decimals
+    # White dwarfs shine by Stefan-Boltzmann from their mass and temperature.
+    solar_luminosity[dwarfs] = (4 * pi * (mass[dwarfs] ** (1 / 3)) ** 2 * STEFAN_BOLTZMANN *
+                                temperature[dwarfs] ** 4) / SOLAR_LUMINOSITY
+    luminosity = solar_luminosity * SOLAR_LUMINOSITY
+    stars["luminosity"] = luminosity
+
+    h_inner = np.round(np.sqrt(solar_luminosity / 1.1) * 500.0, 2)
+    h_outer = np.round(np.sqrt(solar_luminosity / 0.53) * 500.0, 2)
+    h_inner[dwarfs] = np.round(rng.uniform(0.009, 0.012, size=dwarf_count) * 500, 2)
+    h_outer[dwarfs] = np.round(rng.uniform(0.029, 0.032, size=dwarf_count) * 500, 2)
+    stars["h_inner"] = h_inner
+    stars["h_outer"] = h_outer
+
+    # Each class's temperature range is split into tenths; the class is the last tenth the temperature is above.
+    step = (temperature_max - temperature_min) // 10
+    intervals = -(-(temperature_max - temperature_min) // step)
+    temperature_class = np.clip(np.ceil((temperature - temperature_min) / step) - 1, 0, intervals - 1)
+    temperature_class[dwarfs] = -1
+    stars["temperature_class"] = temperature_class
+
+    bolometric_magnitude = -2.5 * np.log10(luminosity) + 71.197
+    luminosity_class = np.searchsorted(BOLOMETRIC_LIMITS, bolometric_magnitude, side="left")
+    luminosity_class[dwarfs] = -1
+    stars["luminosity_class"] = luminosity_class
+
+    return stars
+
+
+class StarField:
+    """ A Star attribute backed by a field of its row in the star array. """
+    def __init__(self, field: str, convert=float):
+        self.field = field
+        self.convert = convert
+
+    def __get__(self, star: "Star", owner):
+        if star is None:
+            return self
+
+        return self.convert(star.stars[self.field][star.index])
+
+    def __set__(self, star: "Star", value) -> None:
+        star.stars[self.field][star.index] = value
+
 
 class Star:
+    """ A view of one row of a star array from generate_stars. A Star made on its own gets a one-row array. """
+    __slots__ = ("name", "stars", "index")
+
+    mass = StarField("mass")
+    luminosity = StarField("luminosity")
+    temperature = StarField("temperature", int)
+    h_inner = StarField("h_inner")
+    h_outer = StarField("h_outer")
+
     # noinspection PyTypeChecker
-    def __init__(self):
+    def __init__(self, stars: np.ndarray = None, index: int = 0):
         self.name: str = ""
-        self.color: Tuple[int, int, int] = (0, 0, 0)
-        self.mass: float = 0.0
-        self.luminosity: float = 3.827E+26
-        self.temperature: int = 0
-        self.temperature_class: int = 0
-        self.stellar_class: StellarClass = None
-        self.luminosity_class: LuminosityClass = None
-        self.h_inner: float = 0.0
-        self.h_outer: float = 0.0
-
-    def generate(self):
-        self.stellar_class = random_choice_from_dict(weighted_chance)
-        if self.stellar_class == StellarClass.CLASS_O:
-            min_temp = 30000
-            max_temp = 55000
-            temp_difference = max_temp - min_temp
-            self.color = (128, 128, 255)
-            self.mass = round(uniform(16, 100), 2)
-            self.luminosity = round(randint(30000, 1000000) * 3.827E+26, 2)
-            self.temperature = round(randint(min_temp, max_temp), -3)
-            self.h_inner = round(sqrt((self.luminosity / 3.827E+26) / 1.1) * 500.0, 2)
-            self.h_outer = round(sqrt((self.luminosity / 3.827E+26) / 0.53) * 500.0, 2)
-        elif self.stellar_class == StellarClass.CLASS_B:
-            min_temp = 10000
-            max_temp = 30000
-            temp_difference = max_temp - min_temp
-            self.color = (64, 64, 255)
-            self.mass = round(uniform(2.1, 16), 2)
-            self.luminosity = round(randint(25, 30000)) * 3.827E+26
-            self.temperature = round(randint(min_temp, max_temp), -2)
-            self.h_inner = round(sqrt(self.luminosity / 1.1) * 500.0, 2)
-            self.h_outer = round(sqrt(self.luminosity / 0.53) * 500.0, 2)
-        elif self.stellar_class == StellarClass.CLASS_A:
-            min_temp = 7500
-            max_temp = 10000
-            temp_difference = max_temp - min_temp
-            self.color = (0, 0, 255)
-            self.mass = round(uniform(1.4, 2.1), 2)
-            self.luminosity = round(randint(5, 25)) * 3.827E+26
-            self.temperature = round(randint(min_temp, max_temp), -2)
-            self.h_inner = round(sqrt(self.luminosity / 1.1) * 500.0, 2)
-            self.h_outer = round(sqrt(self.luminosity / 0.53) * 500.0, 2)
-        elif self.stellar_class == StellarClass.CLASS_F:
-            min_temp = 6000
-            max_temp = 7500
-            temp_difference = max_temp - min_temp
-            self.color = (255, 255, 128)
-            self.mass = round(uniform(1.04, 1.4), 2)
-            self.luminosity = round(uniform(1.5, 5)) * 3.827E+26
-            self.temperature = round(randint(min_temp, max_temp), -2)
-            self.h_inner = round(sqrt(self.luminosity / 1.1) * 500.0, 2)
-            self.h_outer = round(sqrt(self.luminosity / 0.53) * 500.0, 2)
-        elif self.stellar_class == StellarClass.CLASS_G:
-            min_temp = 5200
-            max_temp = 6000
-            temp_difference = max_temp - min_temp
-            self.color = (255, 255, 0)
-            self.mass = round(uniform(0.8, 1.04), 2)
-            self.luminosity = round(uniform(0.6, 1.5), 2) * 3.827E+26
-            self.temperature = round(randint(min_temp, max_temp), -2)
-            self.h_inner = round(sqrt((self.luminosity / 3.827E+26) / 1.1) * 500.0, 2)
-            self.h_outer = round(sqrt((self.luminosity / 3.827E+26) / 0.53) * 500.0, 2)
-        elif self.stellar_class == StellarClass.CLASS_K:
-            min_temp = 3700
-            max_temp = 5200
-            temp_difference = max_temp - min_temp
-            self.color = (255, 185, 115)
-            self.mass = round(uniform(0.45, 0.8), 2)
-            self.luminosity = round(uniform(0.08, 0.6), 2) * 3.827E+26
-            self.temperature = round(randint(min_temp, max_temp), 2)
-            self.h_inner = round(sqrt(self.luminosity / 1.1) * 500.0, 2)
-            self.h_outer = round(sqrt(self.luminosity / 0.53) * 500.0, 2)
-        elif self.stellar_class == StellarClass.CLASS_M:
-            min_temp = 2400
-            max_temp = 3700
-            temp_difference = max_temp - min_temp
-            self.color = (255, 127, 0)
-            self.mass = round(uniform(0.08, 0.45), 2)
-            self.luminosity = round(uniform(0.02, 0.04), 2) * 3.827E+26
-            self.temperature = round(randint(min_temp, max_temp), -2)
-            self.h_inner = round(sqrt(self.luminosity / 1.1) * 500.0, 2)
-            self.h_outer = round(sqrt(self.luminosity / 0.53) * 500.0, 2)
-        else:  # White Dwarf
-            min_temp = 3900
-            max_temp = 5000
-            temp_difference = max_temp - min_temp
-
-            self.color = (255, 255, 255)
-            self.mass = round(triangular(0.17, 1.0, mode=0.6), 2)
-            self.temperature = round(randint(min_temp, max_temp), -2)
-            self.luminosity = 4 * pi * ((self.mass ** (1/3)) ** 2) * 5.670E-8 * (self.temperature ** 4)
-
-            self.h_inner = round(uniform(0.009, 0.012) * 500, 2)
-            self.h_outer = round(uniform(0.029, 0.032) * 500, 2)
-
-        temp_intervals = [t for t in range(min_temp, max_temp, (temp_difference // 10))]
-        for index, interval in enumerate(temp_intervals):
-            if self.temperature > interval:
-                self.temperature_class = index
-
-        bolometric_magnitude = -2.5 * log10(self.luminosity) + 71.197
-        if bolometric_magnitude <= -8:
-            self.luminosity_class = LuminosityClass.IA_PLUS
-        elif -8 < bolometric_magnitude <= -7:
-            self.luminosity_class = LuminosityClass.IA
-        elif -7 < bolometric_magnitude <= -5:
-            self.luminosity_class = LuminosityClass.IB
-        elif -5 < bolometric_magnitude <= -2:
-            self.luminosity_class = LuminosityClass.II
-        elif -2 < bolometric_magnitude <= 0:
-            self.luminosity_class = LuminosityClass.III
-        elif 0 < bolometric_magnitude <= 2.5:
-            self.luminosity_class = LuminosityClass.IV
-        elif 2.5 < bolometric_magnitude <= 5:
-            self.luminosity_class = LuminosityClass.V
-        else:
-            self.luminosity_class = LuminosityClass.VI
 
+        if stars is None:
+            stars = np.zeros(1, dtype=star_dtype)
+            stars["stellar_class"] = -1
+            stars["luminosity_class"] = -1
+            stars["luminosity"] = SOLAR_LUMINOSITY
+
+        self.stars = stars
+        self.index = index
+
+    @property
+    def row(self) -> np.void:
+        return self.stars[self.index]
+
+    @property
+    def stellar_class(self) -> Union[StellarClass, None]:
+        index = self.stars["stellar_class"][self.index]
+
+        return STELLAR_CLASSES[index] if index >= 0 else None
+
+    @property
+    def temperature_class(self) -> Union[int, str]:
+        """ The tenth of its class's temperature range the star falls in, or "" for a white dwarf. """
         if self.stellar_class == StellarClass.CLASS_D:
-            self.temperature_class = ""
-            self.luminosity_class = ""
+            return ""
+
+        return int(self.stars["temperature_class"][self.index])
+
+    @property
+    def luminosity_class(self) -> Union[LuminosityClass, str, None]:
+        """ The star's luminosity class, "" for a white dwarf or None if it hasn't been generated. """
+        if self.stellar_class == StellarClass.CLASS_D:
+            return ""
+
+        index = self.stars["luminosity_class"][self.index]
+
+        return LUMINOSITY_CLASSES[index] if index >= 0 else None
+
+    @property
+    def color(self) -> Tuple[int, int, int]:
+        return tuple(int(c) for c in self.stars["color"][self.index])
+
+    def generate(self, rng: np.random.Generator):
+        self.stars[self.index] = generate_stars(1, rng)[0]
 
 
 if __name__ == '__main__':
 
     while True:
         star = Star()
-        star.generate()
+        star.generate(np.random.default_rng())
         if star.stellar_class in [StellarClass.CLASS_G]:
             print(f"Class: {star.stellar_class.value}{star.temperature_class}{star.luminosity_class.value}\nMass: {star.mass} Msol\nLuminosity: {star.luminosity:.3e} W\nTemperature: {star.temperature} K\nHabitable Zone: {star.h_inner} - {star.h_outer} Ls")
             print(f"Mbol: {-2.5 * log10(star.luminosity) + 71.197:.2f}\n")
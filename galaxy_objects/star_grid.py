@@ -0,0 +1,84 @@
+from math import ceil
+
+import numpy as np
+
+
+class StarGrid:
+    """ Buckets positions into square cells so area and nearest-neighbour queries only look at nearby cells.
+
+    Indexes are sorted by cell, and each row of cells is one contiguous run of that order, so a query reads one
+    slice per row of cells it covers.
+    """
+    def __init__(self, x: np.ndarray, y: np.ndarray, width: float, height: float, cell_size: float):
+        self.x = x
+        self.y = y
+        self.cell_size = cell_size
+        self.columns = max(1, ceil(width / cell_size))
+        self.rows = max(1, ceil(height / cell_size))
+
+        cells = self.cell_y(y) * self.columns + self.cell_x(x)
+        self.order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=self.columns * self.rows)
+        self.starts = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.starts[1:])
+
+    def cell_x(self, x):
+        return np.clip(np.floor_divide(x, self.cell_size).astype(np.int64), 0, self.columns - 1)
+
+    def cell_y(self, y):
+        return np.clip(np.floor_divide(y, self.cell_size).astype(np.int64), 0, self.rows - 1)
+
+    def in_cells(self, cx1: int, cy1: int, cx2: int, cy2: int) -> np.ndarray:
+        """ Returns the indexes of every point in the block of cells from (cx1, cy1) to (cx2, cy2) inclusive. """
+        cx1, cx2 = max(cx1, 0), min(cx2, self.columns - 1)
+        cy1, cy2 = max(cy1, 0), min(cy2, self.rows - 1)
+        if cx1 > cx2 or cy1 > cy2:
+            return np.zeros(0, dtype=np.int64)
+
+        runs = [self.order[self.starts[cy * self.columns + cx1]:self.starts[cy * self.columns + cx2 + 1]]
+                for cy in range(cy1, cy2 + 1)]
+
+        return np.concatenate(runs)
+
+    def in_rect(self, x1: float, y1: float, x2: float, y2: float) -> np.ndarray:
+        """ Returns the indexes of the points with x1 <= x <= x2 and y1 <= y <= y2. """
+        candidates = self.in_cells(int(self.cell_x(x1)), int(self.cell_y(y1)),
+                                   int(self.cell_x(x2)), int(self.cell_y(y2)))
+        x = self.x[candidates]
+        y = self.y[candidates]
+
+        return candidates[(x >= x1) & (x <= x2) & (y >= y1) & (y <= y2)]
+
+    def within_radius(self, x: float, y: float, radius: float) -> np.ndarray:
+        candidates = self.in_rect(x - radius, y - radius, x + radius, y + radius)
+        dx = self.x[candidates] - x
+        dy = self.y[candidates] - y
+
+        return candidates[dx * dx + dy * dy <= radius * radius]
+
+    def nearest(self, x: float, y: float) -> int:
+        """ Returns the index of the closest point, or -1 if there are none. """
+        if not len(self.x):
+            return -1
+
+        cx, cy = int(self.cell_x(x)), int(self.cell_y(y))
+        # Anything outside the block of cells searched so far is at least this far away.
+        edge_distance = min(x - cx * self.cell_size, (cx + 1) * self.cell_size - x,
+                            y - cy * self.cell_size, (cy + 1) * self.cell_size - y)
+        max_ring = max(cx, cy, self.columns - 1 - cx, self.rows - 1 - cy)
+
+        ring = 0
+        while True:
+            candidates = self.in_cells(cx - ring, cy - ring, cx + ring, cy + ring)
+            if len(candidates):
+                distances = np.hypot(self.x[candidates] - x, self.y[candidates] - y)
+                best = int(distances.argmin())
+                if distances[best] <= max(edge_distance, 0) + ring * self.cell_size or ring >= max_ring:
+                    return int(candidates[best])
+            elif ring >= max_ring:
+                return -1
+
+            ring = ring * 2 + 1 if ring else 1
+
+    def __len__(self) -> int:
+        return len(self.x)
@@ -1,3 +1,11 @@
+from typing import List
+
+from galaxy_objects.star import Star
+
+
 class StarSystem:
-    def __init__(self):
-        pass
\ No newline at end of file
+    def __init__(self, system_id: int = 0, x: float = 0.0, y: float = 0.0, stars: List[Star] = None):
+        self.system_id = system_id
+        self.x = x
+        self.y = y
+        self.stars: List[Star] = stars if stars is not None else []
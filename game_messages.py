@@ -1,17 +1,40 @@
 import tcod
 import textwrap
-from typing import Tuple, Dict, Union
+from collections import deque
+from typing import Tuple, Dict, Union, List
+
+import settings as const
 
 
 class Message:
-    def __init__(self, text: str, color: Tuple[int, int, int] = (255, 255, 255)) -> None:
+    def __init__(self, text: str, color: Tuple[int, int, int] = (255, 255, 255), count: int = 1) -> None:
         self.text = text
         self.color = color
+        # How many times in a row this message arrived, shown as "x3" after the text.
+        self.count = count
+        # Wrapped lines keyed by width, dropped whenever the count (and so the shown text) changes.
+        self.wrapped: Dict[int, List[str]] = {}
+
+    @property
+    def display_text(self) -> str:
+        return self.text if self.count == 1 else f"{self.text} x{self.count}"
+
+    def repeat(self) -> None:
+        self.count += 1
+        self.wrapped.clear()
+
+    def wrap(self, width: int) -> List[str]:
+        lines = self.wrapped.get(width)
+        if lines is None:
+            lines = self.wrapped[width] = textwrap.wrap(self.display_text, width) or [""]
+
+        return lines
 
     def to_json(self) -> Dict:
         json_data = {
             "text": self.text,
-            "color": self.color
+            "color": self.color,
+            "count": self.count
         }
 
         return json_data
@@ -21,22 +44,32 @@ class Message:
         if json_data is not None:
             text = json_data["text"]
             color = json_data["color"]
+            count = json_data.get("count", 1)
 
-            return Message(text, color)
+            return Message(text, color, count)
 
         return None
 
 
 class MessageLog:
-    def __init__(self, x: int, width: int, height: int):
-        self.messages = []
+    """ Keeps the most recent messages for scrolling back through, wrapping them only when they are shown. """
+    def __init__(self, x: int, width: int, height: int, capacity: int = const.MESSAGE_HISTORY):
+        self.messages = deque(maxlen=capacity)
         self.x = x
         self.width = width
         self.height = height
+        # How many lines back from the newest the log panel is scrolled.
+        self.scroll_offset = 0
+        # Set whenever a message arrives, cleared once the log has been written to the save file.
+        self.dirty = True
+        # Bumped whenever the shown lines change, so the log panel knows when to redraw.
+        self.revision = 0
 
     def to_json(self) -> Dict:
+        # Only the end of the history is saved; the rest is scrollback for the current session.
+        saved = list(self.messages)[-const.SAVED_MESSAGES:]
         json_data = {
-            "messages": [message.to_json() for message in self.messages],
+            "messages": [message.to_json() for message in saved],
             "x": self.x,
             "width": self.width,
             "height": self.height
@@ -53,16 +86,51 @@ class MessageLog:
         height = json_data["height"]
 
         message_log = MessageLog(x, width, height)
-        message_log.messages = messages
+        message_log.messages.extend(messages)
+        message_log.dirty = False
 
         return message_log
 
     def add_message(self, message: Message):
-        new_msg_lines = textwrap.wrap(message.text, self.width)
-
-        for line in new_msg_lines:
-            if len(self.messages) == self.height:
-                del self.messages[0]
-
-
-            self.messages.append(Message(line, message.color))
+        last = self.messages[-1] if self.messages else None
+        if last is not None and last.text == message.text and tuple(last.color) == tuple(message.color):
+            last.repeat()
+        else:
+            self.messages.append(Message(message.text, message.color))
+
+        self.scroll_offset = 0
+        self.dirty = True
+        self.revision += 1
+
+    def visible_lines(self) -> List[Tuple[str, Tuple[int, int, int]]]:
+        """ Returns the lines that fit in the log panel at the current scroll position, oldest first. """
+        lines = []
+        for message in reversed(self.messages):
+            for line in reversed(message.wrap(self.width)):
+                lines.append((line, message.color))
+
+            if len(lines) >= self.scroll_offset + self.height:
+                break
+
+        # Scrolling past the oldest line just shows the first page.
+        end = max(min(self.scroll_offset, len(lines) - self.height), 0)
+        lines = lines[end:end + self.height]
+        lines.reverse()
+
+        return lines
+
+    def scroll(self, lines: int) -> None:
+        """ Scrolls back through the history by a number of lines, or forward if it is negative. """
+        scroll_offset = max(self.scroll_offset + lines, 0)
+
+        # Stop at the oldest page, which only needs wrapping as far back as the new offset reaches.
+        available = 0
+        for message in reversed(self.messages):
+            available += len(message.wrap(self.width))
+            if available >= scroll_offset + self.height:
+                break
+        scroll_offset = min(scroll_offset, max(available - self.height, 0))
+
+        if scroll_offset != self.scroll_offset:
+            self.scroll_offset = scroll_offset
+            self.revision += 1
@@ -0,0 +1,164 @@
+"""
+Runs the game's turn logic without a window, driven by a policy instead of the keyboard.
+
+A policy is any callable taking the GameSession and returning the next action dict (the same dicts event_handler
+produces), or None to stop.
+"""
+import random
+import time
+from typing import Dict, Iterable, Union
+
+import numpy as np
+
+from engine import GameSession, process_action, recompute_fov
+from game_state import GameState
+from map_objects.flow_field import FlowField, NEIGHBOURS
+
+from loader_functions.init_new_game import get_game_variables
+
+MENU_STATES = (GameState.SHOW_INVENTORY, GameState.DROP_INVENTORY, GameState.CHARACTER_SCREEN,
+               GameState.MESSAGE_BOX)
+
+
+def new_session(seed: int = None) -> GameSession:
+    """ Starts a fresh game that never autosaves. """
+    player, dungeon, message_log, game_state, current_level, _ = get_game_variables(seed)
+
+    return GameSession(player, dungeon, message_log, game_state, current_level, autosave_interval=0)
+
+
+def run_headless(session: GameSession, policy, max_turns: int = 1000, max_actions: int = None) -> Dict:
+    """ Feeds the policy's actions to the game until it stops, the player dies or max_turns enemy phases have run.
+
+    max_actions (by default four per turn) stops policies that never spend a turn from looping forever.
+    """
+    if max_actions is None:
+        max_actions = max_turns * 4
+
+    start_turn = session.turn
+    actions = 0
+    start = time.perf_counter()
+
+    while session.turn - start_turn < max_turns and actions < max_actions:
+        if session.game_state == GameState.PLAYER_DEAD:
+            break
+
+        recompute_fov(session)
+        session.fov_recompute = False
+
+        action = policy(session)
+        if action is None:
+            break
+
+        actions += 1
+        if not process_action(session, action):
+            break
+
+        session.level_changed = False
+
+    elapsed = time.perf_counter() - start
+    turns = session.turn - start_turn
+
+    return {
+        "turns": turns,
+        "actions": actions,
+        "elapsed": elapsed,
+        "turns_per_second": turns / elapsed if elapsed > 0 else 0.0,
+        "dungeon_level": session.current_level,
+        "player_dead": session.game_state == GameState.PLAYER_DEAD
+    }
+
+
+class ScriptedPolicy:
+    """ Replays a fixed list of actions, then stops. """
+    def __init__(self, actions: Iterable[Dict]):
+        self.actions = iter(actions)
+
+    def __call__(self, session: GameSession) -> Union[Dict, None]:
+        return next(self.actions, None)
+
+
+class BotPolicy:
+    """ A simple player: fights whatever it can see, picks up items, otherwise heads for the down stairs.
+
+    Some moves are random so the bot doesn't get stuck behind monsters it can't see. With take_stairs off it stays
+    on its starting level.
+    """
+    def __init__(self, seed: int = None, wander_chance: float = 0.1, take_stairs: bool = True):
+        self.random = random.Random(seed)
+        self.wander_chance = wander_chance
+        self.take_stairs = take_stairs
+        self.stairs_fields: Dict[int, FlowField] = {}
+
+    def __call__(self, session: GameSession) -> Union[Dict, None]:
+        game_state = session.game_state
+
+        if game_state == GameState.PLAYER_DEAD:
+            return None
+
+        if game_state == GameState.LEVEL_UP:
+            return {"level_up": self.random.choice(("hp", "str", "def"))}
+
+        if game_state in MENU_STATES:
+            return {"exit": True}
+
+        if game_state == GameState.TARGETING:
+            target = self.nearest_visible_monster(session)
+            if target is None:
+                return {"right_click": True}
+
+            return {"left_click": (target.x, target.y)}
+
+        return self.take_turn(session)
+
+    def take_turn(self, session: GameSession) -> Dict:
+        player = session.player
+        game_map = session.game_map
+
+        target = self.nearest_visible_monster(session)
+        if target is not None:
+            dx, dy = sign(target.x - player.x), sign(target.y - player.y)
+            if game_map.is_walkable(player.x + dx, player.y + dy):
+                return {"move": (dx, dy)}
+
+        for entity in game_map.get_entities_at(player.x, player.y):
+            if entity.item and len(player.inventory.items) < player.inventory.capacity:
+                return {"pickup": True}
+            if self.take_stairs and entity.stairs and entity.stairs.direction == 1:
+                return {"take_stairs": True}
+
+        if self.take_stairs and self.random.random() >= self.wander_chance:
+            stairs_field = self.stairs_fields.get(game_map.dungeon_level)
+            if stairs_field is None:
+                stairs_field = FlowField(game_map.fov_map)
+                self.stairs_fields[game_map.dungeon_level] = stairs_field
+
+            stairs_field.set_goal(game_map.end_x, game_map.end_y)
+            step = stairs_field.next_step(player.x, player.y, game_map)
+            if step is not None:
+                return {"move": step}
+
+        steps = [(dx, dy) for dx, dy in NEIGHBOURS if game_map.is_walkable(player.x + dx, player.y + dy)]
+        if not steps:
+            return {"wait": True}
+
+        return {"move": self.random.choice(steps)}
+
+    @staticmethod
+    def nearest_visible_monster(session: GameSession):
+        player = session.player
+        store = session.game_map.entity_store
+        x, y = store.x[:store.count], store.y[:store.count]
+
+        candidates = np.flatnonzero(store.actor[:store.count] & store.alive[:store.count] &
+                                    session.game_map.fov_map.fov[x, y])
+        if not len(candidates):
+            return None
+
+        distance = np.maximum(np.abs(x[candidates] - player.x), np.abs(y[candidates] - player.y))
+
+        return store.entities[candidates[distance.argmin()]]
+
+
+def sign(value: int) -> int:
+    return (value > 0) - (value < 0)
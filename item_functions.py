@@ -1,4 +1,5 @@
 from typing import List
+import numpy as np
 import tcod
 
 from game_messages import Message
@@ -26,7 +27,7 @@ def heal(*args, **kwargs) -> List:
 
 def cast_lightning(*args, **kwargs) -> List:
     caster = args[0]
-    entities = kwargs.get("entities")
+    game_map = kwargs.get("game_map")
     fov_map = kwargs.get("fov_map")
     damage = kwargs.get("damage")
     maximum_range = kwargs.get("maximum_range")
@@ -34,15 +35,20 @@ def cast_lightning(*args, **kwargs) -> List:
     results = []
 
     target = None
-    closest_distance = maximum_range + 1
 
-    for entity in entities:
-        if entity.fighter and entity != caster and fov_map.fov[entity.x, entity.y]:
-            distance = caster.distance_to(entity)
+    store = game_map.entity_store
+    x, y = store.x[:store.count], store.y[:store.count]
+    distance = np.hypot(x - caster.x, y - caster.y)
+    candidates = store.alive[:store.count] & fov_map.fov[x, y] & (distance < maximum_range + 1)
+    if caster.store is store:
+        candidates[caster.row] = False
 
-            if distance < closest_distance:
-                target = entity
-                closest_distance = distance
+    if candidates.any():
+        rows = np.flatnonzero(candidates)
+        closest = rows[distance[rows] == distance[rows].min()]
+        # Store rows get reordered as entities are removed, so ties go to the first in the map's entity list, as they
+        # always have.
+        target = min((store.entities[row] for row in closest), key=game_map.entities.index)
 
     if target:
         results.append({"consumed": True,
@@ -57,7 +63,7 @@ def cast_lightning(*args, **kwargs) -> List:
 
 
 def cast_fireball(*args, **kwargs) -> List:
-    entities = kwargs.get("entities")
+    game_map = kwargs.get("game_map")
     fov_map = kwargs.get("fov_map")
     damage = kwargs.get("damage")
     radius = kwargs.get("radius")
@@ -74,16 +80,15 @@ def cast_fireball(*args, **kwargs) -> List:
     results.append({"consumed": True,
                     "message": Message(f"The fireball explodes, burning everything within {radius} tiles!", tcod.orange)})
 
-    for entity in entities:
-        if entity.distance(target_x, target_y) <= radius and entity.fighter:
-            results.append({"message": Message(f"The {entity.name} gets burned for {damage} hit points.", tcod.orange)})
-            results.extend(entity.fighter.take_damage(damage))
+    for entity in game_map.entity_store.living_within(target_x, target_y, radius):
+        results.append({"message": Message(f"The {entity.name} gets burned for {damage} hit points.", tcod.orange)})
+        results.extend(entity.fighter.take_damage(damage))
 
     return results
 
 
 def cast_confuse(*args, **kwargs) -> List:
-    entities = kwargs.get("entities")
+    game_map = kwargs.get("game_map")
     fov_map = kwargs.get("fov_map")
     target_x = kwargs.get("target_x")
     target_y = kwargs.get("target_y")
@@ -94,8 +99,8 @@ def cast_confuse(*args, **kwargs) -> List:
         results.append({'consumed': False, 'message': Message('You cannot target a tile outside your field of view.', tcod.yellow)})
         return results
 
-    for entity in entities:
-        if entity.x == target_x and entity.y == target_y and entity.ai:
+    for entity in game_map.get_entities_at(target_x, target_y):
+        if entity.ai:
             confused_ai = ConfusedMonster(entity.ai, 10)
 
             confused_ai.owner = entity
@@ -139,7 +144,7 @@ def buff(*args, **kwargs) -> List:
 
 
 def ranged_attack(*args, **kwargs) -> List:
-    entities = kwargs.get("entities")
+    game_map = kwargs.get("game_map")
     fov_map = kwargs.get("fov_map")
     target_x = kwargs.get("target_x")
     target_y = kwargs.get("target_y")
@@ -151,8 +156,8 @@ def ranged_attack(*args, **kwargs) -> List:
                         'message': Message('You cannot target a tile outside your field of view.', tcod.yellow)})
         return results
 
-    for entity in entities:
-        if entity.x == target_x and entity.y == target_y and entity.fighter:
+    for entity in game_map.get_entities_at(target_x, target_y):
+        if entity.fighter:
             confused_ai = ConfusedMonster(entity.ai, 10)
 
             confused_ai.owner = entity
@@ -170,3 +175,7 @@ def ranged_attack(*args, **kwargs) -> List:
 
     return results
 
+
+# Item use functions by name, for items.json and save files.
+ITEM_FUNCTIONS = {function.__name__: function for function in (heal, cast_lightning, cast_fireball, cast_confuse, buff,
+                                                               ranged_attack)}
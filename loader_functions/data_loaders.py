@@ -1,39 +1,238 @@
 import os
 import json
-from typing import Dict
+import zipfile
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Iterator, Set, Union
 from entity import Entity
 from map_objects.game_map import GameMap
+from map_objects.dungeon import Dungeon
 from game_messages import MessageLog
 from game_state import GameState
+from random_utils import RandomStreams
 
+import settings as const
 
-def save_game(player: Entity, dungeon: Dict, message_log: MessageLog, game_state: GameState, current_level: int):
-    with open("save_data", mode="w") as f:
-        dungeon[current_level].entities.remove(player)
-        game_data = {
-            "player": player.to_json(),
-            "dungeon": {dungeon_level: game_map.to_json() for dungeon_level, game_map in dungeon.items()},
-            "message_log": message_log.to_json(),
-            "game_state": game_state.value,
-            "current_level": current_level
-        }
+# Version 1 is the original single-document JSON save and version 2 a single zip file. Both are only ever read to
+# migrate them.
+SAVE_VERSION = 3
+HEADER_FILE = "header.json"
 
-        json.dump(game_data, f)
+
+def level_entry(dungeon_level: int, generation: int) -> str:
+    """ Each save writes its levels under its own generation, so it never overwrites a file the previous header
+    still points at.
+    """
+    return f"levels/{dungeon_level}-{generation}.npz"
+
+
+def message_log_entry(generation: int) -> str:
+    return f"message_log-{generation}.json"
+
+
+def save_path(entry: str) -> str:
+    return os.path.join(const.SAVE_DIRECTORY, entry)
+
+
+class SavedLevels(MutableMapping):
+    """ The level blobs of a save directory, each read from its file the first time it is asked for.
+
+    entries maps each level to its file as of the last save. Blobs that were read or set since are kept in memory,
+    so no level is read from disk more than once, and the ones set since the last save are listed in unsaved.
+    """
+    def __init__(self, entries: Dict[int, str] = None, blobs: Dict[int, bytes] = None):
+        self.entries: Dict[int, str] = dict(entries) if entries else {}
+        self.blobs: Dict[int, bytes] = dict(blobs) if blobs else {}
+        self.unsaved: Set[int] = set(self.blobs)
+
+    def __getitem__(self, dungeon_level: int) -> bytes:
+        blob = self.blobs.get(dungeon_level)
+
+        if blob is None:
+            with open(save_path(self.entries[dungeon_level]), mode="rb") as f:
+                blob = self.blobs[dungeon_level] = f.read()
+
+        return blob
+
+    def __setitem__(self, dungeon_level: int, blob: bytes) -> None:
+        self.blobs[dungeon_level] = blob
+        self.unsaved.add(dungeon_level)
+
+    def __delitem__(self, dungeon_level: int) -> None:
+        if dungeon_level not in self:
+            raise KeyError(dungeon_level)
+
+        self.entries.pop(dungeon_level, None)
+        self.blobs.pop(dungeon_level, None)
+        self.unsaved.discard(dungeon_level)
+
+    def __contains__(self, dungeon_level) -> bool:
+        return dungeon_level in self.entries or dungeon_level in self.blobs
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted({*self.entries, *self.blobs}))
+
+    def __len__(self) -> int:
+        return len({*self.entries, *self.blobs})
+
+
+def write_file(entry: str, data: bytes) -> None:
+    """ Writes to a temporary file and swaps it in, so a crash mid-write never leaves half a file behind. """
+    path = save_path(entry)
+    with open(path + ".tmp", mode="wb") as f:
+        f.write(data)
+
+    os.replace(path + ".tmp", path)
+
+
+def read_header() -> Union[Dict, None]:
+    if not os.path.isfile(save_path(HEADER_FILE)):
+        return None
+
+    with open(save_path(HEADER_FILE), mode="r") as f:
+        return json.load(f)
+
+
+def remove_stale_files(header: Dict) -> None:
+    """ Removes the files in the save directory the header doesn't point at, left over from earlier saves. """
+    keep = {HEADER_FILE, header["message_log"], *header["levels"].values()}
+
+    for directory in ("", "levels"):
+        for name in os.listdir(save_path(directory)):
+            entry = f"{directory}/{name}" if directory else name
+            if entry not in keep and os.path.isfile(save_path(entry)):
+                os.remove(save_path(entry))
+
+
+def save_game(player: Entity, dungeon: Dungeon, message_log: MessageLog, game_state: GameState, current_level: int):
+    """ Writes what changed since the last save to new files in the save directory, then swaps in a header that
+    points at them.
+
+    Only levels marked dirty on the dungeon and a changed message log are re-encoded and written; for everything
+    else the new header points at the files of the previous save. The header is replaced last, so a crash mid-save
+    leaves the previous header and every file it points at untouched.
+    """
+    os.makedirs(save_path("levels"), exist_ok=True)
+
+    saved_levels = dungeon.encoded_levels
+    if not isinstance(saved_levels, SavedLevels):
+        # A new or migrated game, none of whose levels are in the save directory yet.
+        saved_levels = dungeon.encoded_levels = SavedLevels(blobs=saved_levels)
+
+    try:
+        previous_header = read_header()
+    except ValueError:
+        previous_header = None
+    generation = previous_header["generation"] + 1 if previous_header is not None else 1
+
+    dungeon[current_level].remove_entity(player)
+
+    try:
+        dungeon.encode_changed()
+    finally:
+        dungeon[current_level].add_entity(player)
+
+    entries = dict(saved_levels.entries)
+    for dungeon_level in sorted(saved_levels.unsaved):
+        entries[dungeon_level] = level_entry(dungeon_level, generation)
+        write_file(entries[dungeon_level], saved_levels[dungeon_level])
+
+    if message_log.dirty or previous_header is None:
+        log_entry = message_log_entry(generation)
+        write_file(log_entry, json.dumps(message_log.to_json()).encode())
+    else:
+        log_entry = previous_header["message_log"]
+
+    header = {
+        "version": SAVE_VERSION,
+        "generation": generation,
+        "game_state": game_state.value,
+        "current_level": current_level,
+        "player": player.to_json(),
+        "message_log": log_entry,
+        "levels": {str(dungeon_level): entry for dungeon_level, entry in entries.items()},
+        "random_streams": dungeon.streams.to_json()
+    }
+    write_file(HEADER_FILE, json.dumps(header).encode())
+
+    saved_levels.entries = entries
+    saved_levels.unsaved.clear()
+    message_log.dirty = False
+
+    remove_stale_files(header)
 
 
 def load_game():
-    if not os.path.isfile("save_data"):
+    header = read_header()
+
+    if header is None:
+        if os.path.isfile(const.ZIP_SAVE_FILE):
+            return migrate_save(load_zip_game, const.ZIP_SAVE_FILE)
+        if os.path.isfile(const.LEGACY_SAVE_FILE):
+            return migrate_save(load_legacy_game, const.LEGACY_SAVE_FILE)
+
         raise FileNotFoundError
 
-    with open("save_data", mode="r") as f:
+    if header["version"] != SAVE_VERSION:
+        raise ValueError(f"Unsupported save version: {header['version']}")
+
+    player = Entity.from_json(header["player"])
+    # Levels are neither read nor decoded here, only when the game first asks for each one.
+    dungeon = Dungeon(SavedLevels({int(dungeon_level): entry for dungeon_level, entry in header["levels"].items()}),
+                      RandomStreams.from_json(header.get("random_streams")))
+    with open(save_path(header["message_log"]), mode="r") as f:
+        message_log = MessageLog.from_json(json.load(f))
+    game_state = GameState(header["game_state"])
+    current_level = int(header["current_level"])
+
+    dungeon[current_level].add_entity(player)
+
+    return player, dungeon, message_log, game_state, current_level
+
+
+def load_zip_game():
+    with zipfile.ZipFile(const.ZIP_SAVE_FILE, mode="r") as save_file:
+        header = json.loads(save_file.read("header.json"))
+
+        if header["version"] != 2:
+            raise ValueError(f"Unsupported save version: {header['version']}")
+
+        player = Entity.from_json(json.loads(save_file.read("player.json")))
+        dungeon = Dungeon({dungeon_level: save_file.read(f"levels/{dungeon_level}.npz")
+                           for dungeon_level in header["levels"]},
+                          RandomStreams.from_json(header.get("random_streams")))
+        message_log = MessageLog.from_json(json.loads(save_file.read("message_log.json")))
+        game_state = GameState(header["game_state"])
+        current_level = int(header["current_level"])
+
+        dungeon[current_level].add_entity(player)
+
+        return player, dungeon, message_log, game_state, current_level
+
+
+def load_legacy_game():
+    with open(const.LEGACY_SAVE_FILE, mode="r") as f:
         json_data = json.load(f)
 
         player = Entity.from_json(json_data["player"])
-        dungeon = {int(dungeon_level): GameMap.from_json(map_data) for dungeon_level, map_data in json_data["dungeon"].items()}
+        dungeon = Dungeon()
+        dungeon.update({int(dungeon_level): GameMap.from_json(map_data)
+                        for dungeon_level, map_data in json_data["dungeon"].items()})
+        for dungeon_level, game_map in dungeon.levels.items():
+            game_map.rng = dungeon.streams.random("ai", dungeon_level)
         message_log = MessageLog.from_json(json_data["message_log"])
         game_state = GameState(json_data["game_state"])
         current_level = int(json_data["current_level"])
 
-        dungeon[current_level].entities.append(player)
+        dungeon[current_level].add_entity(player)
 
         return player, dungeon, message_log, game_state, current_level
+
+
+def migrate_save(load: Callable, old_save_file: str):
+    """ Rewrites an older save in the current format, so the slow path is only taken once. """
+    player, dungeon, message_log, game_state, current_level = load()
+
+    save_game(player, dungeon, message_log, game_state, current_level)
+    os.remove(old_save_file)
+
+    return player, dungeon, message_log, game_state, current_level
@@ -15,7 +15,8 @@ from game_messages import MessageLog
 
 from game_state import GameState
 
-from map_objects.game_map import GameMap
+from map_objects.dungeon import Dungeon
+from random_utils import RandomStreams
 
 import settings as const
 
@@ -85,7 +86,7 @@ def get_constants():
     return constants
 
 
-def get_game_variables():
+def get_game_variables(seed: int = None):
     fighter_component = Fighter(hp=100, defense=1, power=2)
     inventory_component = Inventory(26)
     level_component = Level()
@@ -100,12 +101,9 @@ def get_game_variables():
     player.inventory.add_item(dagger)
     player.equipment.toggle_equip(dagger)
 
-    dungeon = {}
-    game_map = GameMap(const.MAP_WIDTH, const.MAP_HEIGHT)
-    game_map.make_map(const.MAX_ROOMS, const.ROOM_MIN_SIZE, const.ROOM_MAX_SIZE,
-                      const.MAP_WIDTH, const.MAP_HEIGHT, player)
-    game_map.entities.append(player)
-    dungeon.update({game_map.dungeon_level: game_map})
+    dungeon = Dungeon(streams=RandomStreams(seed))
+    game_map = dungeon.generate_level(1, player)
+    game_map.add_entity(player)
 
     message_log = MessageLog(0, const.LOG_WIDTH, const.LOG_HEIGHT)
 
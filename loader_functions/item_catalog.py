@@ -0,0 +1,108 @@
+import json
+import random
+from typing import Dict, List
+
+from entity import Entity, EntityType
+from components.item import Item
+from components.equippable import Equippable
+from equipment_slots import EquipmentSlots
+from game_messages import Message
+from item_functions import ITEM_FUNCTIONS
+from random_utils import LeveledSampler
+
+import settings as const
+
+REQUIRED_KEYS = ("name", "id", "glyph", "color", "chance", "use_function", "targeting", "targeting_message",
+                 "function_kwargs", "equippable")
+
+
+class ItemDefinition:
+    """ One entry of items.json, checked and resolved once so spawning an item doesn't touch the JSON again. """
+    def __init__(self, item_data: Dict):
+        missing = [key for key in REQUIRED_KEYS if key not in item_data]
+        if missing:
+            raise ValueError(f"Item {item_data.get('id')!r} is missing {', '.join(missing)}")
+
+        self.id = item_data["id"]
+        self.name = item_data["name"]
+
+        if len(item_data["glyph"]) != 1:
+            raise ValueError(f"Item {self.id!r} needs a single character glyph")
+        self.glyph = ord(item_data["glyph"])
+        self.color = tuple(item_data["color"])
+
+        weight, min_level = item_data["chance"]
+        self.chance = [int(weight), int(min_level)]
+
+        use_function = item_data["use_function"]
+        if use_function is not None and use_function not in ITEM_FUNCTIONS:
+            raise ValueError(f"Item {self.id!r} uses unknown function {use_function!r}")
+        self.use_function = ITEM_FUNCTIONS[use_function] if use_function is not None else None
+
+        self.targeting = item_data["targeting"]
+        self.targeting_message = item_data["targeting_message"]
+        self.function_kwargs = item_data["function_kwargs"] or {}
+
+        equippable = item_data["equippable"]
+        if equippable is not None:
+            self.equippable = (EquipmentSlots(equippable["slot"]), equippable["power_bonus"],
+                               equippable["defense_bonus"], equippable["max_hp_bonus"])
+        else:
+            self.equippable = None
+
+    def create(self, x: int, y: int) -> Entity:
+        if self.targeting_message is not None:
+            targeting_message = Message(self.targeting_message["text"], self.targeting_message["color"])
+        else:
+            targeting_message = None
+
+        item_component = Item(use_function=self.use_function, targeting=self.targeting,
+                              targeting_message=targeting_message, **self.function_kwargs)
+
+        if self.equippable is not None:
+            slot, power_bonus, defense_bonus, max_hp_bonus = self.equippable
+            equippable_component = Equippable(slot, power_bonus=power_bonus, defense_bonus=defense_bonus,
+                                              max_hp_bonus=max_hp_bonus)
+        else:
+            equippable_component = None
+
+        return Entity(self.name, EntityType.ITEM, x, y, self.glyph, fg=self.color, item=item_component,
+                      equippable=equippable_component)
+
+
+class ItemCatalog:
+    """ Every item that can spawn, with a sampler of their spawn chances for each dungeon level. """
+    def __init__(self, items_data: Dict):
+        self.items: List[ItemDefinition] = [ItemDefinition(item_data) for item_data in items_data["items"]]
+        self.by_id: Dict[str, ItemDefinition] = {}
+        for item in self.items:
+            if item.id in self.by_id:
+                raise ValueError(f"Item id {item.id!r} is used more than once")
+            self.by_id[item.id] = item
+
+        self.sampler = LeveledSampler({item: [item.chance] for item in self.items})
+
+    def random_item(self, dungeon_level: int, rng: random.Random) -> ItemDefinition:
+        """ Picks an item weighted by its chance on this level. """
+        return self.sampler.for_level(dungeon_level).choice(rng)
+
+    def create_item(self, item_id: str, x: int, y: int) -> Entity:
+        return self.by_id[item_id].create(x, y)
+
+    @staticmethod
+    def load(path: str) -> "ItemCatalog":
+        with open(path, mode="r") as f:
+            return ItemCatalog(json.load(f))
+
+
+_item_catalog = None
+
+
+def get_item_catalog() -> ItemCatalog:
+    """ Loads the item catalog on first use and returns the same one after that. """
+    global _item_catalog
+
+    if _item_catalog is None:
+        _item_catalog = ItemCatalog.load(const.ITEMS_FILE)
+
+    return _item_catalog
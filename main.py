@@ -1,3 +1,5 @@
+import zipfile
+
 import tcod
 import tcod.event
 import tcod.console
@@ -7,8 +9,10 @@ from event_handler import handle_main_menu
 from game_state import GameState
 from engine import play_game
 from camera import Camera
+from frame_clock import FrameClock, needs_redraw
 
 from loader_functions.data_loaders import load_game
+from loader_functions.item_catalog import get_item_catalog
 
 import settings as const
 
@@ -16,6 +20,8 @@ import settings as const
 
 
 def main() -> None:
+    # Load items.json up front so a bad entry stops the game here instead of halfway through building a level.
+    get_item_catalog()
 
     tcod.console_set_custom_font('potash_10x10.png',
                                  tcod.FONT_TYPE_GREYSCALE | tcod.FONT_LAYOUT_ASCII_INROW)
@@ -71,20 +77,32 @@ def main() -> None:
 
     current_level = -1
 
+    clock = FrameClock()
+    redraw_menu = True
+
     while True:
 
         if show_main_menu:
-            main_menu(root_console, "heic1104a-edited.png", const.SCREEN_WIDTH, const.SCREEN_HEIGHT)
-            if show_load_error:
-                message_text = "No save exists."
-                message_box(root_console, message_text, len(message_text), const.SCREEN_WIDTH, const.SCREEN_HEIGHT)
-            if show_corrupt_error:
-                message_text = "Corrupt save."
-                message_box(root_console, message_text, len(message_text), const.SCREEN_WIDTH, const.SCREEN_HEIGHT)
-
-            tcod.console_flush()
-
-            action = handle_main_menu(tcod.event.get())
+            # The menu only changes in response to input, so it is drawn once and then waits for some.
+            if redraw_menu:
+                main_menu(root_console, "heic1104a-edited.png", const.SCREEN_WIDTH, const.SCREEN_HEIGHT)
+                if show_load_error:
+                    message_text = "No save exists."
+                    message_box(root_console, message_text, len(message_text), const.SCREEN_WIDTH,
+                                const.SCREEN_HEIGHT)
+                if show_corrupt_error:
+                    message_text = "Corrupt save."
+                    message_box(root_console, message_text, len(message_text), const.SCREEN_WIDTH,
+                                const.SCREEN_HEIGHT)
+
+                tcod.console_flush()
+                redraw_menu = False
+
+            events = clock.wait()
+            redraw_menu = needs_redraw(events)
+
+            action = handle_main_menu(events)
+            redraw_menu |= bool(action)
 
             new_game = action.get("new_game")
             load_save = action.get("load_game")
@@ -107,7 +125,7 @@ def main() -> None:
                     show_main_menu = False
                 except FileNotFoundError:
                     show_load_error = True
-                except KeyError:
+                except (KeyError, ValueError, zipfile.BadZipFile):
                     show_corrupt_error = True
             elif exit_game:
                 break
@@ -119,6 +137,7 @@ def main() -> None:
                       viewport_console, log_console, status_console, entity_console, current_level, camera)
 
             show_main_menu = True
+            redraw_menu = True
 
 
 if __name__ == '__main__':
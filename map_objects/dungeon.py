@@ -0,0 +1,107 @@
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Set
+
+from entity import Entity
+from map_objects.game_map import GameMap
+from random_utils import RandomStreams
+
+import settings as const
+
+
+class Dungeon(MutableMapping):
+    """ Maps dungeon levels to GameMaps, only decoding saved levels the first time they are accessed.
+
+    encoded_levels holds each level as it was last loaded or saved. It is kept as given rather than copied, so it
+    can be a mapping that only reads a level from the save file once it is asked for. Levels that changed since
+    then are listed in dirty and are the only ones re-encoded by the next save. streams holds the game seed every
+    level is generated from.
+    """
+    def __init__(self, encoded_levels: MutableMapping[int, bytes] = None, streams: RandomStreams = None):
+        self.streams = streams if streams is not None else RandomStreams()
+        # Set by the engine while a game is running to build levels ahead of time.
+        self.pregenerator: "LevelPregenerator" = None
+        self.levels: Dict[int, GameMap] = {}
+        self.encoded_levels: MutableMapping[int, bytes] = encoded_levels if encoded_levels is not None else {}
+        self.dirty: Set[int] = set()
+
+    def __getitem__(self, dungeon_level: int) -> GameMap:
+        game_map = self.levels.get(dungeon_level)
+
+        if game_map is None:
+            game_map = GameMap.from_bytes(self.encoded_levels[dungeon_level], self.streams.random("ai", dungeon_level))
+            self.levels[dungeon_level] = game_map
+
+        return game_map
+
+    def __setitem__(self, dungeon_level: int, game_map: GameMap) -> None:
+        if dungeon_level in self.encoded_levels:
+            del self.encoded_levels[dungeon_level]
+        self.levels[dungeon_level] = game_map
+        self.dirty.add(dungeon_level)
+
+    def __delitem__(self, dungeon_level: int) -> None:
+        if dungeon_level not in self:
+            raise KeyError(dungeon_level)
+
+        self.levels.pop(dungeon_level, None)
+        if dungeon_level in self.encoded_levels:
+            del self.encoded_levels[dungeon_level]
+        self.dirty.discard(dungeon_level)
+
+    def __contains__(self, dungeon_level) -> bool:
+        return dungeon_level in self.levels or dungeon_level in self.encoded_levels
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted({*self.levels, *self.encoded_levels}))
+
+    def __len__(self) -> int:
+        return len({*self.levels, *self.encoded_levels})
+
+    def is_loaded(self, dungeon_level: int) -> bool:
+        return dungeon_level in self.levels
+
+    def mark_dirty(self, dungeon_level: int) -> None:
+        self.dirty.add(dungeon_level)
+
+    def encode_level(self, dungeon_level: int) -> bytes:
+        """ Returns the level's save blob, only re-encoding it if it changed since it was last loaded or saved. """
+        if dungeon_level in self.dirty or dungeon_level not in self.encoded_levels:
+            self.encoded_levels[dungeon_level] = self.levels[dungeon_level].to_bytes()
+            self.dirty.discard(dungeon_level)
+
+        return self.encoded_levels[dungeon_level]
+
+    def encode_changed(self) -> None:
+        """ Re-encodes every level that changed since it was last loaded or saved. Levels that were never decoded
+        can't have changed, so they are left as they are.
+        """
+        for dungeon_level in self.levels:
+            if dungeon_level in self.dirty or dungeon_level not in self.encoded_levels:
+                self.encode_level(dungeon_level)
+
+    def generate_level(self, dungeon_level: int, player: Entity) -> GameMap:
+        """ Builds and stores a new level from the level's own streams, so it comes out the same for a given seed
+        whenever it is generated. Moves the player to the level's start but doesn't add them to it.
+
+        A level the pregenerator has already finished is used as-is; otherwise it is generated here and now.
+        """
+        game_map = self.pregenerator.take(dungeon_level) if self.pregenerator is not None else None
+
+        if game_map is None:
+            game_map = GameMap(const.MAP_WIDTH, const.MAP_HEIGHT, dungeon_level=dungeon_level)
+            game_map.make_map(const.MAX_ROOMS, const.ROOM_MIN_SIZE, const.ROOM_MAX_SIZE, const.MAP_WIDTH,
+                              const.MAP_HEIGHT, player, rng=self.streams.random("map", dungeon_level),
+                              spawn_rng=self.streams.random("spawn", dungeon_level))
+        else:
+            player.x = game_map.start_x
+            player.y = game_map.start_y
+
+        game_map.rng = self.streams.random("ai", dungeon_level)
+        self[dungeon_level] = game_map
+
+        return game_map
+
+    def pregenerate(self, dungeon_level: int) -> None:
+        """ Asks the pregenerator, if there is one, to start on a level that doesn't exist yet. """
+        if self.pregenerator is not None and dungeon_level not in self:
+            self.pregenerator.request(dungeon_level)
@@ -0,0 +1,166 @@
+from typing import List
+
+import numpy as np
+
+# The columns kept for every entity on a map, as (name, dtype, shape of one row).
+COLUMNS = (
+    ("x", np.intc, ()),
+    ("y", np.intc, ()),
+    ("glyph", np.intc, ()),
+    ("fg", np.uint8, (3,)),
+    ("blocks", bool, ()),
+    # The entity's EntityType value, which is also its render layer.
+    ("layer", np.int8, ()),
+    ("stairs", bool, ()),
+    ("actor", bool, ()),
+    ("hp", np.intc, ()),
+    ("alive", bool, ())
+)
+
+
+class EntityColumn:
+    """ An Entity attribute that lives in a column of its map's EntityStore, or on the entity itself while it isn't on
+    a map (being built, carried in an inventory, or between levels).
+    """
+    def __init__(self, column: str, decode=int, encode=None):
+        self.column = column
+        self.local = f"_{column}"
+        self.decode = decode
+        self.encode = encode
+
+    def __get__(self, entity: "Entity", owner):
+        if entity is None:
+            return self
+
+        if entity.store is None:
+            return getattr(entity, self.local)
+
+        return self.decode(getattr(entity.store, self.column)[entity.row])
+
+    def __set__(self, entity: "Entity", value) -> None:
+        if entity.store is None:
+            setattr(entity, self.local, value)
+        else:
+            entity.store.write(self.column, entity.row, self.encode(value) if self.encode else value)
+
+
+class EntityStore:
+    """ The hot fields of every entity on a map, one numpy column per field and one row per entity, so the renderer,
+    AI and area effects can work on whole columns. Entities read and write their row through EntityColumn.
+
+    Rows are packed: removing an entity moves the last row into its slot. The render order (by entity type) is
+    only re-sorted when an entity is added, removed or changes type.
+    """
+    def __init__(self, capacity: int = 64):
+        self.count = 0
+        self.entities: List["Entity"] = []
+
+        for name, dtype, shape in COLUMNS:
+            setattr(self, name, np.zeros((capacity,) + shape, dtype=dtype))
+
+        self.order = None
+
+    def _grow(self) -> None:
+        capacity = len(self.x) * 2
+        for name, _, _ in COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def write(self, column: str, row: int, value) -> None:
+        getattr(self, column)[row] = value
+        if column == "layer":
+            self.order = None
+
+    def update_fighter(self, entity: "Entity") -> None:
+        """ Refreshes the hp and alive columns of an entity's row after its fighter or hp changed. """
+        fighter = entity.fighter
+        self.hp[entity.row] = fighter.hp if fighter is not None else 0
+        self.alive[entity.row] = fighter is not None and fighter.hp > 0
+        self.actor[entity.row] = entity.ai is not None
+
+    def add(self, entity: "Entity") -> None:
+        if entity.store is self:
+            return
+        if entity.store is not None:
+            entity.store.remove(entity)
+
+        if self.count == len(self.x):
+            self._grow()
+
+        row = self.count
+        self.count += 1
+        self.entities.append(entity)
+
+        self.x[row] = entity.x
+        self.y[row] = entity.y
+        self.glyph[row] = entity.glyph
+        self.fg[row] = entity.fg
+        self.blocks[row] = entity.blocks
+        self.layer[row] = entity.entity_type.value
+        self.stairs[row] = entity.stairs is not None
+        self.order = None
+
+        entity.store = self
+        entity.row = row
+        self.update_fighter(entity)
+
+    def remove(self, entity: "Entity") -> None:
+        if entity.store is not self:
+            return
+
+        row = entity.row
+        x, y, glyph, fg, blocks, entity_type = (entity.x, entity.y, entity.glyph, entity.fg, entity.blocks,
+                                                entity.entity_type)
+
+        last = self.count - 1
+        if row != last:
+            moved = self.entities[last]
+            self.entities[row] = moved
+            moved.row = row
+            for name, _, _ in COLUMNS:
+                array = getattr(self, name)
+                array[row] = array[last]
+
+        self.entities.pop()
+        self.count = last
+        self.order = None
+
+        # The entity takes its fields back now that it has no row.
+        entity.store = None
+        entity.row = -1
+        entity.x, entity.y, entity.glyph, entity.fg, entity.blocks, entity.entity_type = (x, y, glyph, fg, blocks,
+                                                                                           entity_type)
+
+    def clear(self) -> None:
+        for entity in list(self.entities):
+            self.remove(entity)
+        self.order = None
+
+    def render_order(self) -> np.ndarray:
+        """ Returns row indexes sorted so entities that should be drawn on top come last. """
+        if self.order is None:
+            self.order = np.argsort(self.layer[:self.count], kind="stable")
+
+        return self.order
+
+    def rows_within(self, x: int, y: int, radius: float) -> np.ndarray:
+        """ Returns the rows of the entities at most radius tiles (Euclidean) from (x, y). """
+        dx = self.x[:self.count] - x
+        dy = self.y[:self.count] - y
+
+        return np.flatnonzero(dx * dx + dy * dy <= radius * radius)
+
+    def living_within(self, x: int, y: int, radius: float) -> List["Entity"]:
+        """ Returns the entities with a fighter and hp left at most radius tiles from (x, y), in row order. """
+        rows = self.rows_within(x, y, radius)
+
+        return [self.entities[row] for row in rows[self.alive[rows]]]
+
+    def actors(self) -> List["Entity"]:
+        """ Returns the entities that currently have an AI, in row order. """
+        return [self.entities[row] for row in np.flatnonzero(self.actor[:self.count])]
+
+    def __len__(self) -> int:
+        return self.count
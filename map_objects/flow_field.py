@@ -0,0 +1,71 @@
+from typing import Tuple, Union
+
+import numpy as np
+import tcod.map
+import tcod.path
+
+# Distances are worked out in hundredths of a step, as libtcod's old Dijkstra did, and reported in whole steps rounded
+# down, as its distance lookup did, so monsters keep taking the same routes.
+DISTANCE_SCALE = 100
+UNREACHABLE = np.iinfo(np.int32).max
+
+# Extra distance charged for stepping onto a tile held by a blocking entity, so monsters queue up or route around
+# each other instead of all aiming for the same square.
+OCCUPIED_COST = 5.0
+
+NEIGHBOURS = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+class FlowField:
+    """ Walking distances to a single goal, computed once into an array and shared by every monster heading for it.
+    """
+    def __init__(self, fov_map: tcod.map.Map, diagonal: float = 1.41):
+        self.width = fov_map.width
+        self.height = fov_map.height
+        # A view of the map's walkable tiles, so a recompute always sees the current terrain.
+        self.walkable = fov_map.walkable
+        self.diagonal = round(diagonal * DISTANCE_SCALE)
+        self.distances = np.full((self.width, self.height), UNREACHABLE, dtype=np.int32)
+        self.goal = None
+
+    def set_goal(self, x: int, y: int) -> None:
+        if self.goal != (x, y):
+            self.distances[...] = UNREACHABLE
+            self.distances[x, y] = 0
+            tcod.path.dijkstra2d(self.distances, self.walkable, DISTANCE_SCALE, self.diagonal, out=self.distances)
+            self.goal = (x, y)
+
+    def invalidate(self) -> None:
+        self.goal = None
+
+    def distance(self, x: int, y: int) -> int:
+        """ Returns the walking distance to the goal in whole steps, or -1 if the goal can't be reached from (x, y).
+        """
+        distance = int(self.distances[x, y])
+
+        return -1 if distance == UNREACHABLE else distance // DISTANCE_SCALE
+
+    def next_step(self, x: int, y: int, game_map: "GameMap") -> Union[Tuple[int, int], None]:
+        """ Picks the neighbouring tile that gets closest to the goal, with occupied tiles made more expensive. """
+        best_cost = self.distance(x, y)
+        if best_cost < 0:
+            return None
+
+        best_step = None
+        for dx, dy in NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < self.width and 0 <= ny < self.height):
+                continue
+
+            cost = self.distance(nx, ny)
+            if cost < 0:
+                continue
+
+            if (nx, ny) != self.goal and game_map.get_blocking_entity_at(nx, ny):
+                cost += OCCUPIED_COST
+
+            if cost < best_cost:
+                best_cost = cost
+                best_step = (dx, dy)
+
+        return best_step
@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import numpy as np
+import tcod.map
+
+import settings as const
+
+
+class FovCache:
+    """ The most recently used FOVs of one map, bit-packed and keyed by what they were computed from.
+
+    The key includes the map's terrain revision, so digging or any other change to what blocks sight makes every
+    older entry unreachable; those are dropped as soon as a newer revision is seen.
+    """
+    def __init__(self, capacity: int = const.FOV_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self.revision = None
+        # The part of fov_map.fov that the last compute could have lit, which is all a restore has to clear. None
+        # means unknown (nothing computed through the cache yet), so the whole map gets cleared.
+        self.lit_window = None
+
+        self.hits = 0
+        self.misses = 0
+        self.compute_time = 0.0
+        self.restore_time = 0.0
+
+    def compute(self, fov_map: tcod.map.Map, x: int, y: int, revision: int, radius: int = 0,
+                light_walls: bool = True, algorithm: int = 0) -> None:
+        """ Fills fov_map.fov as compute_fov would, restoring it from the cache when it has been seen before. """
+        if revision != self.revision:
+            self.entries.clear()
+            self.revision = revision
+
+        key = (x, y, revision, radius, light_walls, algorithm)
+        fov = fov_map.fov
+        # Nothing outside the radius can be lit, so only the square around (x, y) is stored.
+        if radius > 0:
+            window = np.s_[max(x - radius, 0):x + radius + 1, max(y - radius, 0):y + radius + 1]
+        else:
+            window = np.s_[:, :]
+
+        start = time.perf_counter()
+        packed = self.entries.get(key)
+        if packed is not None:
+            self.entries.move_to_end(key)
+            fov[self.lit_window if self.lit_window is not None else np.s_[:, :]] = False
+            self.lit_window = window
+            lit = fov[window]
+            lit[...] = np.unpackbits(packed, count=lit.size).reshape(lit.shape)
+            self.hits += 1
+            self.restore_time += time.perf_counter() - start
+            return
+
+        fov_map.compute_fov(x, y, radius=radius, light_walls=light_walls, algorithm=algorithm)
+        self.lit_window = window
+        self.misses += 1
+        self.compute_time += time.perf_counter() - start
+
+        if self.capacity > 0:
+            self.entries[key] = np.packbits(fov[window], axis=None)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """ Hit rate and mean times, for sizing the cache. """
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "bytes": sum(packed.nbytes for packed in self.entries.values()),
+            "mean_compute_us": self.compute_time / self.misses * 1e6 if self.misses else 0.0,
+            "mean_restore_us": self.restore_time / self.hits * 1e6 if self.hits else 0.0
+        }
@@ -1,8 +1,8 @@
+import io
 import numpy as np
 import json
-from random import randint
-from math import sqrt
-from typing import List, Dict
+import random
+from typing import List, Dict, Union
 
 import tcod
 import tcod.map
@@ -10,20 +10,32 @@ import tcod.map
 from entity import Entity, EntityType
 
 from map_objects.rect import Rect
+from map_objects.room_layout import RoomLayout
 from map_objects.tile_map import TileMap
+from map_objects.spatial_index import SpatialIndex
+from map_objects.entity_store import EntityStore
+from map_objects.flow_field import FlowField
+from map_objects.fov_cache import FovCache
+from effect_scheduler import EffectScheduler
+from turn_scheduler import TurnScheduler
 
 from components.fighter import Fighter
 from components.ai import BasicMonster
-from components.item import Item
 from components.stairs import Stairs
-from components.equipment import EquipmentSlots
-from components.equippable import Equippable
 
-from random_utils import from_dungeon_level, random_choice_from_dict
-from item_functions import heal, cast_lightning, cast_fireball, cast_confuse, buff
+from loader_functions.item_catalog import get_item_catalog
+from random_utils import from_dungeon_level, LeveledSampler
 from game_messages import MessageLog, Message
 import charmap as ch
 
+# How many rooms in a row make_map can fail to place before it checks whether the map is full.
+SATURATION_CHECK_INTERVAL = 200
+
+MONSTER_CHANCES = LeveledSampler({
+    "orc": [[80, 1]],
+    "troll": [[15, 3], [30, 5], [60, 7]]
+})
+
 map_dtype = np.dtype([("glyph", np.intc), ("fg", "(3,)i4"), ("bg", "(3,)i4")])
 
 
@@ -33,18 +45,31 @@ class GameMap:
         self.height = map_height
         self.dungeon_level = dungeon_level
         self.entities = []
+        self.entity_index = SpatialIndex()
+        self.entity_store = EntityStore()
+        self.effects = EffectScheduler()
+        self.turns = TurnScheduler(self.entity_store)
         self.start_x = 0
         self.start_y = 0
         self.end_x = 0
         self.end_y = 0
+        self.room_count = 0
 
         self.tile_map = TileMap(self.width, self.height)
         self.fov_map = tcod.map.Map(self.width, self.height, order="F")
         self.explored = np.zeros((self.width, self.height), dtype=bool, order="F")
+        # Bumped by anything that changes which tiles block sight or movement.
+        self.revision = 0
+        self.fov_cache = FovCache()
 
         self.fov_map.walkable[:] = False
         self.fov_map.transparent[:] = False
 
+        self.flow_field = None
+        # Randomness for whatever happens on this level during play, such as confused monsters stumbling about. It is
+        # seeded by Dungeon.generate_level or restored by from_bytes, and None until then so nothing draws unseeded.
+        self.rng: random.Random = None
+
     def to_json(self) -> Dict:
         json_data = {
             "width": self.width,
@@ -79,125 +104,210 @@ class GameMap:
         loaded_map.fov_map.fov[:] = fov_fov[:]
         loaded_map.explored = explored
         loaded_map.dungeon_level = dungeon_level
-        loaded_map.entities = entities
+
+        for entity in entities:
+            loaded_map.add_entity(entity)
+
+        return loaded_map
+
+    def to_bytes(self) -> bytes:
+        """ Packs the level into a compressed npz blob: raw tile and FOV arrays plus one JSON record per entity.
+
+        The state of the level's rng goes in too, so monsters pick up their random draws where they left off.
+        """
+        rng_version, rng_words, rng_gauss = self.rng.getstate()
+        meta = {
+            "width": self.width,
+            "height": self.height,
+            "dungeon_level": self.dungeon_level,
+            "start_x": self.start_x,
+            "start_y": self.start_y,
+            "end_x": self.end_x,
+            "end_y": self.end_y,
+            "default_fg": self.tile_map.default_fg,
+            "default_bg": self.tile_map.default_bg,
+            "rng_state": [rng_version, list(rng_words), rng_gauss]
+        }
+        entity_records = "\n".join(json.dumps(entity.to_json(), separators=(",", ":")) for entity in self.entities)
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer,
+                            meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+                            glyph=self.tile_map.glyph,
+                            fg=self.tile_map.fg,
+                            bg=self.tile_map.bg,
+                            transparent=self.fov_map.transparent,
+                            walkable=self.fov_map.walkable,
+                            fov=self.fov_map.fov,
+                            explored=self.explored,
+                            entities=np.frombuffer(entity_records.encode(), dtype=np.uint8))
+
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_bytes(data: bytes, rng: random.Random = None) -> "GameMap":
+        """ Rebuilds a level from to_bytes data. rng is only used by blobs saved without an rng state. """
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            meta = json.loads(arrays["meta"].tobytes())
+            entity_records = arrays["entities"].tobytes().decode()
+
+            loaded_map = GameMap(meta["width"], meta["height"], dungeon_level=meta["dungeon_level"])
+            loaded_map.start_x = meta["start_x"]
+            loaded_map.start_y = meta["start_y"]
+            loaded_map.end_x = meta["end_x"]
+            loaded_map.end_y = meta["end_y"]
+
+            if "rng_state" in meta:
+                rng_version, rng_words, rng_gauss = meta["rng_state"]
+                loaded_map.rng = random.Random()
+                loaded_map.rng.setstate((rng_version, tuple(rng_words), rng_gauss))
+            else:
+                loaded_map.rng = rng
+
+            loaded_map.tile_map = TileMap(meta["width"], meta["height"], meta["default_fg"], meta["default_bg"])
+            loaded_map.tile_map.set_tiles(np.s_[:, :], glyph=arrays["glyph"], fg=arrays["fg"], bg=arrays["bg"])
+
+            loaded_map.fov_map.transparent[:] = arrays["transparent"]
+            loaded_map.fov_map.walkable[:] = arrays["walkable"]
+            loaded_map.fov_map.fov[:] = arrays["fov"]
+            loaded_map.explored[:] = arrays["explored"]
+
+        for record in entity_records.splitlines():
+            loaded_map.add_entity(Entity.from_json(json.loads(record)))
 
         return loaded_map
 
     def make_map(self, max_rooms: int, room_min_size: int, room_max_size: int, map_width: int,
-                 map_height: int, player: Entity):
-        rooms = []
+                 map_height: int, player: Entity, rng: random.Random, spawn_rng: random.Random = None):
+        """ Digs out rooms and tunnels and fills them with monsters and items.
+
+        The layout is drawn from rng and the spawns from spawn_rng, which defaults to rng.
+        """
+        if spawn_rng is None:
+            spawn_rng = rng
+
+        layout = RoomLayout(map_width, map_height)
         num_rooms = 0
+        failed_attempts = 0
 
         center_of_last_room_x = None
         center_of_last_room_y = None
 
         for r in range(max_rooms):
-            w = randint(room_min_size, room_max_size)
-            h = randint(room_min_size, room_max_size)
+            w = rng.randint(room_min_size, room_max_size)
+            h = rng.randint(room_min_size, room_max_size)
 
-            x = randint(0, map_width - w - 2)
-            y = randint(0, map_height - h - 2)
+            x = rng.randint(0, map_width - w - 2)
+            y = rng.randint(0, map_height - h - 2)
 
             new_room = Rect(x, y, w, h)
 
-            for other_room in rooms:
-                if new_room.intersect(other_room):
-                    break
-
-            else:
-                self.dig_room(new_room)
+            if not layout.fits(new_room):
+                failed_attempts += 1
+                if failed_attempts >= SATURATION_CHECK_INTERVAL:
+                    # Once even the smallest room has nowhere to go, the remaining attempts can't change the map.
+                    if layout.is_saturated(room_min_size):
+                        break
+                    failed_attempts = 0
 
-                new_x, new_y = new_room.center()
+                continue
 
-                center_of_last_room_x = new_x
-                center_of_last_room_y = new_y
+            failed_attempts = 0
+            self.dig_room(new_room)
 
-                if num_rooms == 0:
-                    player.x = new_x
-                    player.y = new_y
-                    self.start_x = new_x
-                    self.start_y = new_y
-                else:
-                    other = find_nearest_room(new_room, rooms)
+            new_x, new_y = new_room.center()
 
-                    prev_x, prev_y = other.center()
-                    # new_x, new_y = new_room.center()
+            center_of_last_room_x = new_x
+            center_of_last_room_y = new_y
 
-                    # print(f"\t\tNearest room to {(new_x, new_y)} is {(prev_x, prev_y)}")
+            if num_rooms == 0:
+                player.x = new_x
+                player.y = new_y
+                self.start_x = new_x
+                self.start_y = new_y
+            else:
+                prev_x, prev_y = layout.nearest_center(new_room)
 
-                    if randint(0, 1) == 1:
-                        self.dig_h_tunnel(new_x, prev_x, new_y)
-                        self.dig_v_tunnel(prev_x, prev_y, new_y)
-                    else:
-                        self.dig_v_tunnel(new_x, new_y, prev_y)
-                        self.dig_h_tunnel(new_x, prev_x, prev_y)
+                if rng.randint(0, 1) == 1:
+                    self.dig_h_tunnel(new_x, prev_x, new_y)
+                    self.dig_v_tunnel(prev_x, prev_y, new_y)
+                else:
+                    self.dig_v_tunnel(new_x, new_y, prev_y)
+                    self.dig_h_tunnel(new_x, prev_x, prev_y)
 
-                if num_rooms > 0:
-                    self.place_entities(new_room)
+            if num_rooms > 0:
+                self.place_entities(new_room, spawn_rng)
 
-                rooms.append(new_room)
-                num_rooms += 1
+            layout.add(new_room)
+            num_rooms += 1
 
         self.end_x = center_of_last_room_x
         self.end_y = center_of_last_room_y
+        self.room_count = num_rooms
 
         down_stairs_component = Stairs(1)
         down_stairs = Entity("Stairs", EntityType.STAIRS, center_of_last_room_x, center_of_last_room_y, ord('>'),
                              (255, 255, 255), stairs=down_stairs_component)
-        self.entities.append(down_stairs)
+        self.add_entity(down_stairs)
 
         if self.dungeon_level > 1:
             up_stairs_component = Stairs(-1)
             up_stairs = Entity("Stairs", EntityType.STAIRS, player.x, player.y, ord('<'),
                                (255, 255, 255), stairs=up_stairs_component)
-            self.entities.append(up_stairs)
+            self.add_entity(up_stairs)
 
     def dig_h_tunnel(self, x1: int, x2: int, y: int) -> None:
         start_x = min(x1, x2)
         end_x = max(x1, x2)
         self.fov_map.walkable[start_x:end_x + 1, y] = True
         self.fov_map.transparent[start_x:end_x + 1, y] = True
-        self.tile_map.glyph[start_x:end_x + 1, y] = 0
+        self.tile_map.set_tiles(np.s_[start_x:end_x + 1, y], glyph=0)
+        self.terrain_changed()
 
     def dig_v_tunnel(self, x: int, y1: int, y2: int) -> None:
         start_y = min(y1, y2)
         end_y = max(y1, y2)
         self.fov_map.walkable[x, start_y:end_y + 1] = True
         self.fov_map.transparent[x, start_y:end_y + 1] = True
-        self.tile_map.glyph[x, start_y:end_y + 1] = 0
+        self.tile_map.set_tiles(np.s_[x, start_y:end_y + 1], glyph=0)
+        self.terrain_changed()
 
     def dig_room(self, room: Rect):
         self.fov_map.walkable[room.x1 + 1:room.x2, room.y1 + 1:room.y2] = True
         self.fov_map.transparent[room.x1 + 1:room.x2, room.y1 + 1:room.y2] = True
-        self.tile_map.glyph[room.x1 + 1:room.x2, room.y1 + 1:room.y2] = 0
-
-    def place_entities(self, room: Rect):
+        self.tile_map.set_tiles(np.s_[room.x1 + 1:room.x2, room.y1 + 1:room.y2], glyph=0)
+        self.terrain_changed()
+
+    def terrain_changed(self) -> None:
+        """ Must be called after changing fov_map.walkable or transparent, so cached FOVs and paths are dropped. """
+        self.revision += 1
+        if self.flow_field is not None:
+            self.flow_field.invalidate()
+
+    def compute_fov(self, x: int, y: int, radius: int = 0, light_walls: bool = True, algorithm: int = 0) -> None:
+        """ Computes the FOV from (x, y) into fov_map.fov, reusing an earlier result for the same spot if the
+        terrain hasn't changed since.
+        """
+        self.fov_cache.compute(self.fov_map, x, y, self.revision, radius, light_walls, algorithm)
+
+    def place_entities(self, room: Rect, rng: random.Random):
         max_monsters_per_room = from_dungeon_level([[2, 1], [3, 4], [5, 6]], self.dungeon_level)
         max_items_per_room = from_dungeon_level([[1, 1], [2, 4]], self.dungeon_level)
 
-        number_of_monsters = randint(0, max_monsters_per_room)
-        number_of_items = randint(0, max_items_per_room)
+        number_of_monsters = rng.randint(0, max_monsters_per_room)
+        number_of_items = rng.randint(0, max_items_per_room)
 
-        with open("items.json", mode='r') as f:
-            items_data = json.load(f)
-            # print(items_data)
-            items = [item for item in items_data["items"]]
-            # for item in items:
-            #     print(f'{item["id"]} {item["chance"]}')
-            item_chances = {item["id"]: from_dungeon_level([item["chance"]], self.dungeon_level) for item in items}
+        item_catalog = get_item_catalog()
 
-        monster_chances = {
-            "orc": 80,
-            "troll": from_dungeon_level([[15, 3], [30, 5], [60, 7]], self.dungeon_level)
-        }
+        monster_sampler = MONSTER_CHANCES.for_level(self.dungeon_level)
 
         for i in range(number_of_monsters):
             # Choose a random location in the room
-            x = randint(room.x1 + 1, room.x2 - 1)
-            y = randint(room.y1 + 1, room.y2 - 1)
+            x = rng.randint(room.x1 + 1, room.x2 - 1)
+            y = rng.randint(room.y1 + 1, room.y2 - 1)
 
-            if not any([entity for entity in self.entities if entity.x == x and entity.y == y]):
-                monster_choice = random_choice_from_dict(monster_chances)
+            if not self.entity_index.is_occupied(x, y):
+                monster_choice = monster_sampler.choice(rng)
 
                 if monster_choice == "orc":
                     fighter_component = Fighter(hp=20, defense=0, power=4, xp=35)
@@ -210,93 +320,79 @@ class GameMap:
                     monster = Entity("Troll", EntityType.ACTOR, x, y, ord('T'), tcod.darker_green, blocks=True,
                                      fighter=fighter_component, ai=ai_component)
 
-                self.entities.append(monster)
+                self.add_entity(monster)
 
         for i in range(number_of_items):
-            x = randint(room.x1 + 1, room.x2 - 1)
-            y = randint(room.y1 + 1, room.y2 - 1)
-
-            if not any([entity for entity in self.entities if entity.x == x and entity.y == y]):
-                item_choice = random_choice_from_dict(item_chances)
-                chosen_item = None
-                for item in items_data["items"]:
-                    if item["id"] == item_choice:
-                        if item["targeting_message"]:
-                            targeting_message = Message(item["targeting_message"]["text"],
-                                                        item["targeting_message"]["color"])
-                        else:
-                            targeting_message = None
-
-                        if item["use_function"]:
-                            use_function = eval(item["use_function"])
-                        else:
-                            use_function = None
-
-                        if item["function_kwargs"]:
-                            item_component = Item(use_function=use_function, targeting=item["targeting"],
-                                                  targeting_message=targeting_message, **item["function_kwargs"])
-                        else:
-                            item_component = Item(use_function=use_function, targeting=item["targeting"],
-                                                  targeting_message=targeting_message)
-
-                        if item["equippable"]:
-                            equippable_component = Equippable(EquipmentSlots(item["equippable"]["slot"]),
-                                                              power_bonus=item["equippable"]["power_bonus"],
-                                                              defense_bonus=item["equippable"]["defense_bonus"],
-                                                              max_hp_bonus=item["equippable"]["max_hp_bonus"])
-                        else:
-                            equippable_component = None
-
-                        chosen_item = Entity(item["name"], EntityType.ITEM, x, y, ord(item["glyph"]), fg=item["color"],
-                                             item=item_component, equippable=equippable_component)
-                # if item_choice == "healing_potion":
-                #     item_component = Item(use_function=heal, amount=40)
-                #     item = Entity("Healing Potion", EntityType.ITEM, x, y, ord('!'), fg=tcod.violet,
-                #                   item=item_component)
-                # elif item_choice == "sword":
-                #     equippable_component = Equippable(EquipmentSlots.MAIN_HAND, power_bonus=3)
-                #     item = Entity("Sword", EntityType.ITEM, x, y, ord('/'), fg=tcod.sky,
-                #                   equippable=equippable_component)
-                # elif item_choice == "shield":
-                #     equippable_component = Equippable(EquipmentSlots.OFF_HAND, defense_bonus=1)
-                #     item = Entity("Shield", EntityType.ITEM, x, y, ord('['), fg=tcod.darker_orange,
-                #                   equippable=equippable_component)
-                # elif item_choice == "fireball_scroll":
-                #     item_component = Item(use_function=cast_fireball, targeting=True, targeting_message=Message(
-                #        'Left-click a target tile for the fireball, or right-click to cancel.', tcod.light_cyan),
-                #                          damage=25, radius=3)
-                #     item = Entity("Fireball Scroll", EntityType.ITEM, x, y, ord('#'), fg=tcod.orange,
-                #                   item=item_component)
-                # elif item_choice == "confusion_scroll":
-                #     item_component = Item(use_function=cast_confuse, targeting=True, targeting_message=Message(
-                #        'Left-click an enemy to confuse it, or right-click to cancel.', tcod.light_cyan))
-                #     item = Entity("Confusion Scroll", EntityType.ITEM, x, y, ord('#'), fg=tcod.light_pink,
-                #                   item=item_component)
-                # else:
-                #     item_component = Item(use_function=cast_lightning, damage=40, maximum_range=5)
-                #     item = Entity("Lightning Scroll", EntityType.ITEM, x, y, ord('#'), fg=tcod.yellow,
-                #                   item=item_component)
-
-                self.entities.append(chosen_item)
+            x = rng.randint(room.x1 + 1, room.x2 - 1)
+            y = rng.randint(room.y1 + 1, room.y2 - 1)
+
+            if not self.entity_index.is_occupied(x, y):
+                chosen_item = item_catalog.random_item(self.dungeon_level, rng).create(x, y)
+
+                self.add_entity(chosen_item)
 
     def is_walkable(self, x, y) -> bool:
         return self.fov_map.walkable[x, y]
 
-    def take_stairs(self, player: Entity, message_log: MessageLog, constants: Dict, dungeon: Dict,
+    def add_entity(self, entity: Entity) -> None:
+        self.entities.append(entity)
+        self.entity_index.add(entity)
+        self.entity_store.add(entity)
+        self.effects.add_entity(entity)
+        self.turns.add(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        self.entities.remove(entity)
+        self.entity_index.remove(entity)
+        self.entity_store.remove(entity)
+        self.effects.remove_entity(entity)
+        self.turns.remove(entity)
+
+    def update_entity(self, entity: Entity) -> None:
+        """ Must be called whenever an entity on this map changes its position or blocks flag. """
+        self.entity_index.update(entity)
+
+    def get_blocking_entity_at(self, x: int, y: int) -> Union[Entity, None]:
+        return self.entity_index.get_blocking(x, y)
+
+    def get_entities_at(self, x: int, y: int) -> List[Entity]:
+        return self.entity_index.get_all(x, y)
+
+    def get_flow_field(self, goal_x: int, goal_y: int) -> FlowField:
+        """ Returns the shared distance field towards (goal_x, goal_y), recomputing it only when the goal moves. """
+        if self.flow_field is None:
+            self.flow_field = FlowField(self.fov_map)
+
+        self.flow_field.set_goal(goal_x, goal_y)
+
+        return self.flow_field
+
+    def take_stairs(self, player: Entity, message_log: MessageLog, constants: Dict, dungeon: "Dungeon",
                     direction: int) -> None:
         assert (direction == -1 or direction == 1), "Invalid Direction"
         if direction == 1:
             self.dungeon_level += 1
-            self.entities = [player]
+            for entity in self.entities:
+                self.effects.remove_entity(entity)
+                self.turns.remove(entity)
+            self.entities = []
+            self.entity_index.clear()
+            self.entity_store.clear()
+            self.add_entity(player)
 
             self.fov_map = tcod.map.Map(self.width, self.height, order="F")
             self.explored = np.zeros((self.width, self.height), dtype=bool)
+            self.flow_field = None
 
             self.fov_map.walkable[:] = False
             self.fov_map.transparent[:] = False
 
             self.make_map(constants["max_rooms"], constants["room_min_size"], constants["room_max_size"],
-                          constants["map_width"], constants["map_height"], player)
+                          constants["map_width"], constants["map_height"], player,
+                          rng=dungeon.streams.random("map", self.dungeon_level),
+                          spawn_rng=dungeon.streams.random("spawn", self.dungeon_level))
+            self.rng = dungeon.streams.random("ai", self.dungeon_level)
+            self.update_entity(player)
 
             player.fighter.heal(player.fighter.max_hp // 2)
 
@@ -306,21 +402,3 @@ class GameMap:
 
         else:
             pass
-
-
-def find_nearest_room(room: Rect, others: List[Rect]) -> Rect:
-    nearest = room
-    shortest_distance = 10000
-    for other in others:
-        x, y = room.center()
-        o_x, o_y = other.center()
-        if shortest_distance > distance(x, y, o_x, o_y) and x != o_x and y != o_y:
-            shortest_distance = distance(x, y, o_x, o_y)
-            nearest = other
-
-    # print(f"\t\tNearest room to {room.center()} is {nearest.center()}")
-    return nearest
-
-
-def distance(x1: int, y1: int, x2: int, y2: int) -> int:
-    return int(sqrt((x2 - x1)**2 + (y2 - y1)**2))
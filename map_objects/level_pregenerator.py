@@ -0,0 +1,56 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Dict, Union
+
+from entity import Entity, EntityType
+from map_objects.dungeon import Dungeon
+from map_objects.game_map import GameMap
+from random_utils import RandomStreams
+
+import settings as const
+
+
+def build_level(seed: int, dungeon_level: int) -> bytes:
+    """ Generates a level in a worker process and returns it as GameMap.to_bytes data.
+
+    Levels only depend on the seed and their depth, so this builds the same level the game would have.
+    """
+    dungeon = Dungeon(streams=RandomStreams(seed))
+    # make_map only uses the player to mark where they arrive, which is the level's start either way.
+    stand_in = Entity("Player", EntityType.PLAYER, 0, 0, ord('@'))
+
+    return dungeon.generate_level(dungeon_level, stand_in).to_bytes()
+
+
+class LevelPregenerator:
+    """ Builds upcoming levels in a background process while the player is busy with the current one. """
+    def __init__(self, streams: RandomStreams, executor: Executor = None):
+        self.seed = streams.seed
+        self.executor = executor if executor is not None else ProcessPoolExecutor(max_workers=1)
+        self.pending: Dict[int, Future] = {}
+
+    def request(self, dungeon_level: int) -> None:
+        if dungeon_level not in self.pending:
+            self.pending[dungeon_level] = self.executor.submit(build_level, self.seed, dungeon_level)
+
+    def take(self, dungeon_level: int, wait: float = const.PREGENERATE_WAIT) -> Union[GameMap, None]:
+        """ Returns the level from the worker, or None if the caller should build it itself.
+
+        A level the worker hasn't started on is cancelled. One it is part-way through is waited on for up to wait
+        seconds, since finishing it is quicker than starting over; if it still isn't done by then, None is returned
+        and the worker's level is thrown away when it arrives, so that level ends up being built twice.
+        """
+        future = self.pending.pop(dungeon_level, None)
+        if future is None or future.cancel():
+            return None
+
+        try:
+            return GameMap.from_bytes(future.result(timeout=wait))
+        except Exception:
+            # It timed out, or the worker failed.
+            return None
+
+    def shutdown(self) -> None:
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,71 @@
+from typing import Tuple
+
+import numpy as np
+
+from map_objects.rect import Rect
+
+
+class RoomLayout:
+    """ Tracks the rooms placed so far on a map for make_map.
+
+    Every cell a room's Rect covers (walls included) is marked in an occupancy grid, so testing a new room against
+    all the others is a single slice. Room centers are kept in arrays that grow as rooms are added, so the nearest
+    room is found in one vectorized pass.
+    """
+    def __init__(self, map_width: int, map_height: int, capacity: int = 64):
+        self.map_width = map_width
+        self.map_height = map_height
+        self.claimed = np.zeros((map_width, map_height), dtype=bool)
+
+        self.count = 0
+        self.center_x = np.zeros(capacity, dtype=np.intc)
+        self.center_y = np.zeros(capacity, dtype=np.intc)
+
+    def fits(self, room: Rect) -> bool:
+        """ Same result as checking Rect.intersect against every room added so far. """
+        return not self.claimed[room.x1:room.x2 + 1, room.y1:room.y2 + 1].any()
+
+    def add(self, room: Rect) -> None:
+        self.claimed[room.x1:room.x2 + 1, room.y1:room.y2 + 1] = True
+
+        if self.count == len(self.center_x):
+            self.center_x = np.resize(self.center_x, self.count * 2)
+            self.center_y = np.resize(self.center_y, self.count * 2)
+
+        self.center_x[self.count], self.center_y[self.count] = room.center()
+        self.count += 1
+
+    def nearest_center(self, room: Rect) -> Tuple[int, int]:
+        """ Returns the center of the closest room that shares neither a row nor a column with this room's center.
+
+        Distances are truncated to whole tiles and ties go to the earliest room added. If no room qualifies, the
+        room's own center is returned.
+        """
+        x, y = room.center()
+        others_x = self.center_x[:self.count]
+        others_y = self.center_y[:self.count]
+
+        distances = np.sqrt((others_x - x) ** 2 + (others_y - y) ** 2).astype(np.intc)
+        candidates = np.flatnonzero((others_x != x) & (others_y != y) & (distances < 10000))
+        if not len(candidates):
+            return x, y
+
+        nearest = candidates[distances[candidates].argmin()]
+
+        return int(others_x[nearest]), int(others_y[nearest])
+
+    def is_saturated(self, room_min_size: int) -> bool:
+        """ True once no room of at least room_min_size can be placed anywhere on the map. """
+        # Rooms are placed with their top-left corner at most (map size - room size - 2), so their Rects stay
+        # within the map minus its last row and column.
+        size = room_min_size + 1
+        free = ~self.claimed[:self.map_width - 1, :self.map_height - 1]
+        if free.shape[0] < size or free.shape[1] < size:
+            return True
+
+        # Count free cells in every size x size window with a summed-area table.
+        table = np.zeros((free.shape[0] + 1, free.shape[1] + 1), dtype=np.intc)
+        table[1:, 1:] = free.cumsum(axis=0).cumsum(axis=1)
+        windows = table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]
+
+        return not (windows == size * size).any()
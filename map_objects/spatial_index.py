@@ -0,0 +1,59 @@
+from typing import Dict, List, Tuple, Union
+
+
+class SpatialIndex:
+    """ Buckets entities by tile, keeping blocking and non-blocking entities apart. """
+    def __init__(self):
+        self.blocking: Dict[Tuple[int, int], List["Entity"]] = {}
+        self.non_blocking: Dict[Tuple[int, int], List["Entity"]] = {}
+        # Where each entity was last filed, so it can be found again after its x, y or blocks change.
+        self.keys: Dict[int, Tuple[int, int, bool]] = {}
+
+    def add(self, entity: "Entity") -> None:
+        if id(entity) in self.keys:
+            self.update(entity)
+            return
+
+        buckets = self.blocking if entity.blocks else self.non_blocking
+        buckets.setdefault((entity.x, entity.y), []).append(entity)
+        self.keys[id(entity)] = (entity.x, entity.y, entity.blocks)
+
+    def remove(self, entity: "Entity") -> None:
+        key = self.keys.pop(id(entity), None)
+        if key is None:
+            return
+
+        x, y, blocks = key
+        buckets = self.blocking if blocks else self.non_blocking
+        bucket = buckets[(x, y)]
+        bucket.remove(entity)
+        if not bucket:
+            del buckets[(x, y)]
+
+    def update(self, entity: "Entity") -> None:
+        """ Re-files an entity after its position or blocks flag changed. Unindexed entities are ignored. """
+        key = self.keys.get(id(entity))
+        if key is None or key == (entity.x, entity.y, entity.blocks):
+            return
+
+        self.remove(entity)
+        self.add(entity)
+
+    def clear(self) -> None:
+        self.blocking.clear()
+        self.non_blocking.clear()
+        self.keys.clear()
+
+    def get_blocking(self, x: int, y: int) -> Union["Entity", None]:
+        bucket = self.blocking.get((x, y))
+
+        return bucket[0] if bucket else None
+
+    def get_non_blocking(self, x: int, y: int) -> List["Entity"]:
+        return self.non_blocking.get((x, y), [])
+
+    def get_all(self, x: int, y: int) -> List["Entity"]:
+        return self.blocking.get((x, y), []) + self.non_blocking.get((x, y), [])
+
+    def is_occupied(self, x: int, y: int) -> bool:
+        return (x, y) in self.blocking or (x, y) in self.non_blocking
@@ -4,24 +4,45 @@ from typing import Dict, Union, Tuple
 import charmap as ch
 
 
-map_dtype = np.dtype([("glyph", np.intc), ("fg", "(3,)i4"), ("bg", "(3,)i4")])
+# Same layout as tcod's Console.tiles2, so whole layers can be copied into a console without conversion.
+tile_dtype = np.dtype({"names": ["ch", "fg", "bg"], "formats": [np.intc, "3B", "3B"], "offsets": [0, 4, 8],
+                       "itemsize": 12})
 
 
 class TileMap:
+    """ Keeps every tile in two renderer-ready layers: lit for tiles in view and dark for remembered ones.
+
+    glyph, fg and bg are read-only views of the lit layer. Write through set_tiles so the dark layer stays in sync.
+    """
     def __init__(self, width: int, height: int, fg: Tuple[int, int, int] = (255, 0, 0),
                  bg: Tuple[int, int, int] = (128, 0, 0)):
         self.width = width
         self.height = height
-        self.tiles: np.ndarray = np.zeros((width, height), dtype=map_dtype, order="F")
-        self.glyph: np.ndarray = self.tiles["glyph"]
-        self.fg: np.ndarray = self.tiles["fg"]
-        self.bg: np.ndarray = self.tiles["bg"]
+        self.lit: np.ndarray = np.zeros((width, height), dtype=tile_dtype, order="F")
+        self.dark: np.ndarray = np.zeros((width, height), dtype=tile_dtype, order="F")
+        self.glyph: np.ndarray = self.lit["ch"]
+        self.fg: np.ndarray = self.lit["fg"]
+        self.bg: np.ndarray = self.lit["bg"]
+        for view in (self.glyph, self.fg, self.bg):
+            view.flags.writeable = False
         self.default_fg = fg
         self.default_bg = bg
 
-        self.glyph[:] = ch.WALL
-        self.fg[:] = fg
-        self.bg[:] = bg
+        self.set_tiles(np.s_[:, :], glyph=ch.WALL, fg=fg, bg=bg)
+
+    def set_tiles(self, index, glyph=None, fg=None, bg=None) -> None:
+        """ Writes glyphs and/or colors to the tiles selected by index, updating both layers. """
+        if glyph is not None:
+            self.lit["ch"][index] = glyph
+            self.dark["ch"][index] = glyph
+
+        if fg is not None:
+            self.lit["fg"][index] = fg
+            self.dark["fg"][index] = self.lit["fg"][index] // 2
+
+        if bg is not None:
+            self.lit["bg"][index] = bg
+            self.dark["bg"][index] = self.lit["bg"][index] // 2
 
     def to_json(self) -> Dict:
         json_data = {
@@ -50,8 +71,6 @@ class TileMap:
         d_bg = json_data["default_bg"]
 
         tile_map = TileMap(width, height, d_fg, d_bg)
-        tile_map.tiles["glyph"] = glyph
-        tile_map.tiles["fg"] = fg
-        tile_map.tiles["bg"] = bg
+        tile_map.set_tiles(np.s_[:, :], glyph=glyph, fg=fg, bg=bg)
 
         return tile_map
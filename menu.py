@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 import tcod
 import tcod.console
 
@@ -57,15 +57,37 @@ def inventory_menu(console: tcod.console.Console, header: str, player: Entity,
     menu(console, header, options, inventory_width, screen_width, screen_height)
 
 
-def main_menu(console: tcod.console.Console, bg_image: str, screen_width: int, screen_height: int) -> None:
-    console.clear()
+class MenuBackground:
+    """ The main menu's background image with the title drawn over it, composed once per console size. """
+    def __init__(self, bg_image: str, title_file: str = "arcturus.xp"):
+        self.bg_image = bg_image
+        self.title_file = title_file
+        self.console = None
+
+    def get(self, width: int, height: int) -> tcod.console.Console:
+        """ Returns the composed background, rebuilding it only if the size has changed. """
+        if self.console is None or (self.console.width, self.console.height) != (width, height):
+            self.console = self.compose(width, height)
+
+        return self.console
+
+    def compose(self, width: int, height: int) -> tcod.console.Console:
+        background = tcod.console.Console(width, height, order="F")
+
+        tcod.image_load(self.bg_image).blit_2x(background, 0, 0)
+        tcod.console_from_xp(self.title_file).blit(background, 24, 24, bg_alpha=0.0)
 
-    bg_image = tcod.image_load(bg_image)
-    bg_image.blit_2x(console, 0, 0)
+        return background
 
-    title_con = tcod.console_from_xp("arcturus.xp")
 
-    title_con.blit(console, 24, 24, bg_alpha=0.0)
+menu_backgrounds: Dict[str, MenuBackground] = {}
+
+
+def main_menu(console: tcod.console.Console, bg_image: str, screen_width: int, screen_height: int) -> None:
+    if bg_image not in menu_backgrounds:
+        menu_backgrounds[bg_image] = MenuBackground(bg_image)
+
+    menu_backgrounds[bg_image].get(console.width, console.height).blit(console)
 
     menu(console, "", ["New Game", "Load Game", "Quit"], 13, screen_width, screen_height, sy=31)
 
@@ -1,5 +1,17 @@
-from typing import List, Dict, Any
-from random import randint
+import random
+from bisect import bisect_left
+from itertools import accumulate
+from typing import List, Dict, Any, Union
+
+import numpy as np
+
+# Each kind of randomness gets its own branch of the seed, so drawing more in one never shifts another.
+STREAM_DOMAINS = {
+    "map": 0,
+    "spawn": 1,
+    "ai": 2,
+    "galaxy": 3
+}
 
 
 def from_dungeon_level(table: List, dungeon_level: int):
@@ -10,22 +22,85 @@ def from_dungeon_level(table: List, dungeon_level: int):
     return 0
 
 
-def random_choice_index(chances: List) -> int:
-    random_chance = randint(1, sum(chances))
+class WeightedSampler:
+    """ Picks from a fixed set of choices with chances proportional to their weights.
+
+    The running totals are worked out once, so each draw is a bisect instead of a scan over every weight.
+    """
+    def __init__(self, choice_dict: Dict):
+        self.choices = list(choice_dict.keys())
+        self.cumulative = list(accumulate(choice_dict.values()))
+        self.total = self.cumulative[-1] if self.cumulative else 0
+        self.cumulative_array = np.array(self.cumulative, dtype=np.int64)
+        self.choice_array = np.empty(len(self.choices), dtype=object)
+        self.choice_array[:] = self.choices
+
+    def choice(self, rng: random.Random) -> Any:
+        """ Picks one choice, drawing a single randint from rng, which is required so every draw comes from a seeded
+        stream.
+        """
+        draw = rng.randint(1, self.total)
+
+        return self.choices[bisect_left(self.cumulative, draw)]
+
+    def sample_indices(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """ Draws n indexes into choices at once. """
+        return np.searchsorted(self.cumulative_array, rng.integers(1, self.total, size=n, endpoint=True))
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """ Draws n choices at once, as an object array. """
+        return self.choice_array[self.sample_indices(n, rng)]
+
+
+class LeveledSampler:
+    """ WeightedSamplers for chance tables that change with depth, built the first time each level needs one.
+
+    chance_tables maps each choice to a from_dungeon_level table of [weight, minimum level] pairs.
+    """
+    def __init__(self, chance_tables: Dict[Any, List]):
+        self.chance_tables = chance_tables
+        self.samplers: Dict[int, WeightedSampler] = {}
+
+    def for_level(self, dungeon_level: int) -> WeightedSampler:
+        sampler = self.samplers.get(dungeon_level)
+
+        if sampler is None:
+            sampler = WeightedSampler({choice: from_dungeon_level(table, dungeon_level)
+                                       for choice, table in self.chance_tables.items()})
+            self.samplers[dungeon_level] = sampler
+
+        return sampler
+
+
+class RandomStreams:
+    """ Derives independent random number generators from one game seed.
+
+    Every stream is keyed by a domain from STREAM_DOMAINS plus any ids (such as the dungeon level), and is built
+    fresh from the seed and that key. The same seed and key always give the same stream, whichever process asks
+    for it and whatever was drawn before.
+    """
+    def __init__(self, seed: int = None):
+        self.seed = np.random.SeedSequence(seed).entropy
+
+    def seed_sequence(self, domain: str, *key: int) -> np.random.SeedSequence:
+        return np.random.SeedSequence(self.seed, spawn_key=(STREAM_DOMAINS[domain], *key))
 
-    running_sum = 0
-    choice = 0
-    for w in chances:
-        running_sum += w
+    def generator(self, domain: str, *key: int) -> np.random.Generator:
+        """ A numpy Generator, for drawing many numbers at once. """
+        return np.random.default_rng(self.seed_sequence(domain, *key))
 
-        if random_chance <= running_sum:
-            return choice
+    def random(self, domain: str, *key: int) -> random.Random:
+        """ A random.Random seeded from the same stream, for code that draws one number at a time. """
+        state = self.seed_sequence(domain, *key).generate_state(4)
 
-        choice += 1
+        return random.Random(sum(int(word) << (32 * i) for i, word in enumerate(state)))
 
+    def to_json(self) -> Dict:
+        return {"seed": self.seed}
 
-def random_choice_from_dict(choice_dict: Dict) -> Any:
-    choices = list(choice_dict.keys())
-    chances = list(choice_dict.values())
+    @staticmethod
+    def from_json(json_data: Union[Dict, None]) -> "RandomStreams":
+        if json_data is None:
+            return RandomStreams()
 
-    return choices[random_choice_index(chances)]
+        return RandomStreams(int(json_data["seed"]))
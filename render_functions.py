@@ -6,6 +6,7 @@ import numpy as np
 
 from entity import Entity, EntityType
 from map_objects.game_map import GameMap
+from map_objects.tile_map import tile_dtype
 from game_messages import MessageLog
 from game_state import GameState
 from menu import inventory_menu, level_up_menu, character_screen, message_box
@@ -16,6 +17,8 @@ import settings as const
 
 SHOW_STATS = True
 
+BLANK_TILE = np.zeros((), dtype=tile_dtype)
+
 
 def render_bar(panel: tcod.console.Console, x: int, y: int, total_width: int, name: str, value: int, maximum: int,
                bar_color: Tuple[int, int, int], back_color: Tuple[int, int, int]):
@@ -31,15 +34,50 @@ def render_bar(panel: tcod.console.Console, x: int, y: int, total_width: int, na
     panel.print(px, y, bar_str, fg=(255, 255, 255))
 
 
-def get_names_under_mouse(mx: int, my: int, entities: List[Entity], game_map):
-    names = [entity.name for entity in entities if entity.x == mx and entity.y == my and
-             game_map.fov_map.fov[mx, my]]
+def get_names_under_mouse(mx: int, my: int, game_map: GameMap):
+    names = [entity.name for entity in game_map.get_entities_at(mx, my) if game_map.fov_map.fov[mx, my]]
 
     names = ', '.join(names)
 
     return names.capitalize()
 
 
+class RenderState:
+    """ Remembers which panels need redrawing, so frames where nothing changed can be skipped. """
+    def __init__(self):
+        self.viewport = True
+        self.status = True
+        self.log = True
+        self.entities = True
+
+        self.game_state = None
+        self.status_inputs = None
+        self.log_revision = None
+
+        # Set while something on screen changes on its own, which keeps the loop drawing at the frame cap instead
+        # of waiting for input.
+        self.animating = False
+
+    def mark_dirty(self, viewport: bool = False, status: bool = False, log: bool = False,
+                   entities: bool = False) -> None:
+        self.viewport |= viewport
+        self.status |= status
+        self.log |= log
+        self.entities |= entities
+
+    def mark_all_dirty(self) -> None:
+        self.mark_dirty(viewport=True, status=True, log=True, entities=True)
+
+    def is_dirty(self) -> bool:
+        return self.viewport or self.status or self.log or self.entities
+
+    def clear(self) -> None:
+        self.viewport = False
+        self.status = False
+        self.log = False
+        self.entities = False
+
+
 # noinspection PyUnresolvedReferences
 def render_all(root_console: tcod.console.Console,
                offscreen_console: tcod.console.Console,
@@ -49,23 +87,35 @@ def render_all(root_console: tcod.console.Console,
                entity_console: tcod.console.Console,
                player: Entity, game_map: GameMap, mouse_tx: int, mouse_ty: int,
                fov_recompute: bool, game_messages: MessageLog, box_text: str,
-               game_state: GameState, camera: "Camera") -> None:
+               game_state: GameState, camera: "Camera", render_state: RenderState) -> bool:
+    """ Redraws the panels whose inputs changed and presents the frame. Returns False if nothing needed drawing. """
 
     screen_height = const.SCREEN_HEIGHT
     screen_width = const.SCREEN_WIDTH
     bar_width = const.BAR_WIDTH
 
-    status_console.clear()
-    log_console.clear()
-    entity_console.clear()
+    # Menus are drawn straight onto the root console, so any state change needs the whole frame recomposed.
+    if game_state != render_state.game_state:
+        render_state.game_state = game_state
+        render_state.mark_all_dirty()
 
     if fov_recompute:
+        render_state.mark_dirty(viewport=True, entities=True)
+
+    status_inputs = (player.fighter.hp, player.fighter.max_hp, game_map.dungeon_level,
+                     get_names_under_mouse(mouse_tx, mouse_ty, game_map))
+    if status_inputs != render_state.status_inputs:
+        render_state.status_inputs = status_inputs
+        render_state.status = True
 
-        # Show nothing by default
-        viewport_console.ch[:] = 0
-        viewport_console.fg[:] = (0, 0, 0)
-        viewport_console.bg[:] = (0, 0, 0)
+    if game_messages.revision != render_state.log_revision:
+        render_state.log_revision = game_messages.revision
+        render_state.log = True
 
+    if not render_state.is_dirty():
+        return False
+
+    if fov_recompute:
         # Move camera to follow the player
         camera.move_camera(player.x, player.y, game_map.width, game_map.height)
         cam_x, cam_y = camera.x, camera.y
@@ -74,60 +124,55 @@ def render_all(root_console: tcod.console.Console,
         # Translate map coordinates to camera coordinates
         cam_fov = game_map.fov_map.fov[cam_x:cam_x2+1, cam_y:cam_y2+1]
         cam_explored = game_map.explored[cam_x:cam_x2+1, cam_y:cam_y2+1]
-        cam_glyph = game_map.tile_map.glyph[cam_x:cam_x2+1, cam_y:cam_y2+1]
-        cam_fg = game_map.tile_map.fg[cam_x:cam_x2+1, cam_y:cam_y2+1]
-        cam_bg = game_map.tile_map.bg[cam_x:cam_x2 + 1, cam_y:cam_y2 + 1]
+        cam_lit = game_map.tile_map.lit[cam_x:cam_x2+1, cam_y:cam_y2+1]
+        cam_dark = game_map.tile_map.dark[cam_x:cam_x2+1, cam_y:cam_y2+1]
 
-        # If a tile is explored but not visible, render it in dark colors.
-        viewport_console.fg[cam_explored == True] = np.multiply(cam_fg[cam_explored == True], 0.50).astype(np.int)
-        viewport_console.bg[cam_explored == True] = np.multiply(cam_bg[cam_explored == True], 0.50).astype(np.int)
-        viewport_console.ch[cam_explored == True] = cam_glyph[cam_explored == True]
+        # Show nothing by default, explored tiles in their dark layer and visible tiles in their lit layer.
+        viewport_console.tiles2[:] = BLANK_TILE
+        np.copyto(viewport_console.tiles2, cam_dark, where=cam_explored)
+        np.copyto(viewport_console.tiles2, cam_lit, where=cam_fov)
 
-        # If a tile is visible then render it in light colors.
-        viewport_console.fg[cam_fov == True] = cam_fg[cam_fov == True]
-        viewport_console.bg[cam_fov == True] = cam_bg[cam_fov == True]
-        viewport_console.ch[cam_fov == True] = cam_glyph[cam_fov == True]
-        # viewport_console.ch[cam_transparent == False] = 178
+    if render_state.viewport:
+        draw_entities(viewport_console, game_map, camera)
 
-        # If a tile is visible, then it is now explored.
-        game_map.explored[game_map.fov_map.fov == True] = True
+        viewport_console.blit(offscreen_console, 1, 1)
 
-    # Draw all entities in the list
-    entities_in_render_order = sorted(game_map.entities, key=lambda x: x.entity_type.value)
+    if render_state.status:
+        status_console.clear()
+        render_bar(status_console, 1, 1, bar_width, 'HP', player.fighter.hp, player.fighter.max_hp,
+                   tcod.light_red, tcod.darker_red)
+        status_console.print(1, 3, f"Dungeon Level: {game_map.dungeon_level}")
 
-    for entity in entities_in_render_order:
-        draw_entity(viewport_console, entity, game_map, camera)
+        status_console.print(1, 0, status_inputs[3], fg=(128, 128, 128))
+        status_console.blit(offscreen_console, const.VIEWPORT_WIDTH + 2, 1)
 
-    render_bar(status_console, 1, 1, bar_width, 'HP', player.fighter.hp, player.fighter.max_hp,
-               tcod.light_red, tcod.darker_red)
-    status_console.print(1, 3, f"Dungeon Level: {game_map.dungeon_level}")
+    if render_state.log:
+        log_console.clear()
+        for y, (line, color) in enumerate(game_messages.visible_lines()):
+            log_console.print(game_messages.x, y, line, fg=color)
 
-    status_console.print(1, 0, get_names_under_mouse(mouse_tx, mouse_ty, game_map.entities, game_map),
-                         fg=(128, 128, 128))
+        log_console.blit(offscreen_console, 1, const.VIEWPORT_HEIGHT + 2)
 
-    y = 0
-    for message in game_messages.messages:
-        log_console.print(game_messages.x, y, message.text, fg=message.color)
-        y += 1
+    if render_state.entities:
+        entity_console.clear()
+        entity_console.print(5, 0, "Visible:", (128, 128, 128))
 
-    entity_console.print(5, 0, "Visible:", (128, 128, 128))
+        store = game_map.entity_store
+        order = store.render_order()
+        visible_rows = order[game_map.fov_map.fov[store.x[order], store.y[order]]]
 
-    visible_entities = [entity for entity in entities_in_render_order if tcod.map_is_in_fov(game_map.fov_map, entity.x,
-                                                                                            entity.y)]
+        for index, row in enumerate(visible_rows[:entity_console.height - 1], start=1):
+            entity = store.entities[row]
+            if entity.entity_type not in [EntityType.PLAYER, EntityType.CORPSE]:
+                entity_str = f"{chr(entity.glyph)}: {entity.name.capitalize()}"
+                entity_console.print(1, index, entity_str, entity.fg)
 
-    for index, entity in enumerate(visible_entities, start=1):
-        if entity.entity_type not in [EntityType.PLAYER, EntityType.CORPSE]:
-            entity_str = f"{chr(entity.glyph)}: {entity.name.capitalize()}"
-            entity_console.print(1, index, entity_str, entity.fg)
+        entity_console.blit(offscreen_console, const.VIEWPORT_WIDTH + 2, const.STATUS_HEIGHT + 2)
 
     draw_frames(offscreen_console)
 
     # offscreen_console.print(0, screen_height - 1, f"{mouse_tx}, {mouse_ty}")
 
-    viewport_console.blit(offscreen_console, 1, 1)
-    status_console.blit(offscreen_console, const.VIEWPORT_WIDTH + 2, 1)
-    log_console.blit(offscreen_console, 1, const.VIEWPORT_HEIGHT + 2)
-    entity_console.blit(offscreen_console, const.VIEWPORT_WIDTH + 2, const.STATUS_HEIGHT + 2)
     offscreen_console.blit(root_console)
 
     if game_state in [GameState.SHOW_INVENTORY, GameState.DROP_INVENTORY]:
@@ -155,27 +200,45 @@ def render_all(root_console: tcod.console.Console,
 
     tcod.console_flush()
 
+    render_state.clear()
 
-# noinspection PyUnresolvedReferences
-def clear_all(viewport_console: tcod.console.Console, entities: List, camera: "Camera"):
-    for entity in entities:
-        x, y = camera.to_camera_coordinates(entity.x, entity.y)
-        # print(x, y)
-        if x is not None and y is not None:
-            viewport_console.ch[x, y] = 0
+    return True
 
 
 # noinspection PyUnresolvedReferences
-def draw_entity(offscreen_console: tcod.console.Console, entity: Entity, game_map: GameMap, camera: "Camera"):
-    x, y = camera.to_camera_coordinates(entity.x, entity.y)
+def clear_all(viewport_console: tcod.console.Console, game_map: GameMap, camera: "Camera"):
+    store = game_map.entity_store
+    x, y = store.x[:store.count] - camera.x, store.y[:store.count] - camera.y
+    on_screen = (x >= 0) & (y >= 0) & (x < camera.width) & (y < camera.height)
+
+    viewport_console.ch[x[on_screen], y[on_screen]] = 0
+
+
+def draw_entities(console: tcod.console.Console, game_map: GameMap, camera: "Camera"):
+    """ Draws every entity that is in view, or remembered stairs, in one scatter into the console. """
+    store = game_map.entity_store
+    order = store.render_order()
+    map_x, map_y = store.x[order], store.y[order]
+
+    in_fov = game_map.fov_map.fov[map_x, map_y]
+    remembered_stairs = store.stairs[order] & game_map.explored[map_x, map_y] & ~in_fov
+
+    x, y = map_x - camera.x, map_y - camera.y
+    on_screen = (x >= 0) & (y >= 0) & (x < camera.width) & (y < camera.height)
+    drawn = np.flatnonzero((in_fov | remembered_stairs) & on_screen)
+
+    # Where entities share a tile only the last in render order may be drawn, since numpy doesn't say which of
+    # several writes to one index wins. np.unique on the reversed tile indexes finds each tile's last entity.
+    _, last = np.unique((x[drawn] * camera.height + y[drawn])[::-1], return_index=True)
+    drawn = drawn[len(drawn) - 1 - last]
 
-    if tcod.map_is_in_fov(game_map.fov_map, entity.x, entity.y) or (entity.stairs and game_map.explored[entity.x, entity.y]):
-        if x is not None and y is not None:
-            offscreen_console.tiles2[x, y] = (entity.glyph, entity.fg, game_map.tile_map.default_bg)
+    tiles = np.empty(len(drawn), dtype=tile_dtype)
+    tiles["ch"] = store.glyph[order[drawn]]
+    tiles["fg"] = store.fg[order[drawn]]
+    tiles["bg"] = game_map.tile_map.default_bg
+    tiles["bg"][remembered_stairs[drawn]] = np.multiply(game_map.tile_map.default_bg, 0.50).astype(np.uint8)
 
-        if entity.stairs and not tcod.map_is_in_fov(game_map.fov_map, entity.x, entity.y):
-            if x is not None and y is not None:
-                offscreen_console.bg[x, y] = np.multiply(game_map.tile_map.default_bg, 0.50).astype(np.int)
+    console.tiles2[x[drawn], y[drawn]] = tiles
 
 
 def clear_entity(offscreen_console, entity):
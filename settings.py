@@ -16,6 +16,9 @@ BAR_WIDTH = STATUS_WIDTH - 2
 
 LOG_WIDTH = VIEWPORT_WIDTH
 LOG_HEIGHT = SCREEN_HEIGHT - VIEWPORT_HEIGHT - 3
+# Messages kept for scrolling back through the log, and how many of the newest are written to the save file.
+MESSAGE_HISTORY = 1000
+SAVED_MESSAGES = 100
 
 MAP_WIDTH = 75
 MAP_HEIGHT = 75
@@ -24,6 +27,37 @@ ROOM_MAX_SIZE = 10
 ROOM_MIN_SIZE = 6
 MAX_ROOMS = 10000
 
+# Build the next level down in a background process while the player explores the current one.
+PREGENERATE_LEVELS = True
+# Longest the stairs wait for a level the worker is part-way through, in seconds, before building it in-process.
+PREGENERATE_WAIT = 2.0
+
+# Most frames per second drawn while something on screen is animating. 0 removes the cap.
+FRAME_CAP = 60
+# Longest the loop sleeps waiting for input when nothing is animating, in seconds.
+IDLE_TIMEOUT = 1.0
+
 FOV_ALGO = 0
 FOV_LIGHT_WALLS = True
-FOV_RADIUS = 10
\ No newline at end of file
+FOV_RADIUS = 10
+# FOVs remembered per level, so walking back over old ground restores them instead of recomputing. 0 disables it.
+FOV_CACHE_SIZE = 256
+
+# Units of scheduler time in one turn. A monster acts again ACTION_COST * NORMAL_SPEED / speed units after its last
+# action, so one at NORMAL_SPEED acts once a turn and one at twice that acts twice.
+ACTION_COST = 100
+NORMAL_SPEED = 100
+# Monsters that only react to what they see doze off further than this from the player (in tiles, on either axis).
+# It has to be more than FOV_RADIUS so nothing that could be seen is asleep; 0 keeps every monster awake.
+WAKE_RADIUS = FOV_RADIUS + 2 if FOV_RADIUS else 0
+
+ITEMS_FILE = "items.json"
+
+# Each level and the message log get a file of their own, so a save only writes the ones that changed.
+SAVE_DIRECTORY = "saved_game"
+# Earlier single-file save formats, only ever read to migrate them.
+ZIP_SAVE_FILE = "save_data.sav"
+LEGACY_SAVE_FILE = "save_data"
+
+# Turns between autosaves, 0 disables them. Taking the stairs always autosaves when this is non-zero.
+AUTOSAVE_INTERVAL = 100
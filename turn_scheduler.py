@@ -0,0 +1,106 @@
+import heapq
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from map_objects.entity_store import EntityStore
+
+import settings as const
+
+
+class TurnScheduler:
+    """ Decides which monsters on a map act in each enemy phase, and in what order.
+
+    Every phase spans ACTION_COST units of time, and a monster acts again ACTION_COST * NORMAL_SPEED / speed units
+    after its last action, so a normal-speed monster acts once a phase and a double-speed one twice. Where that
+    doesn't divide evenly, the remainder is carried into the monster's next delay, so over many actions it keeps its
+    exact rate instead of drifting faster. Ties go to the monster added to the map first, which is the order the
+    entity list used to give.
+
+    Monsters whose AI only reacts to what it can see doze off once they are out of wake_radius of the player. A
+    dozing monster leaves the queue entirely until the player comes back within range or a noise nearby wakes it,
+    so a phase only costs as much as the monsters that are awake.
+    """
+    def __init__(self, store: EntityStore, wake_radius: int = const.WAKE_RADIUS):
+        self.store = store
+        self.wake_radius = wake_radius
+        self.time = 0
+        self.queue: List[Tuple[int, int, "Entity"]] = []
+        # The map-wide add order of every scheduled monster, by id, which breaks ties between equal times.
+        self.orders: Dict[int, int] = {}
+        # Each monster's leftover from its last delay, in 1/speed units of time.
+        self.remainders: Dict[int, int] = {}
+        self.asleep: Dict[int, "Entity"] = {}
+        self.next_order = 0
+        self.player_position = None
+
+    def delay(self, entity: "Entity") -> int:
+        """ The time until the monster acts again, with whatever was rounded off its last delay added back in. """
+        speed = max(entity.fighter.speed if entity.fighter else const.NORMAL_SPEED, 1)
+        delay, self.remainders[id(entity)] = divmod(const.ACTION_COST * const.NORMAL_SPEED +
+                                                    self.remainders.get(id(entity), 0), speed)
+
+        return max(1, delay)
+
+    def add(self, entity: "Entity") -> None:
+        if entity.ai is None or id(entity) in self.orders:
+            return
+
+        self.orders[id(entity)] = self.next_order
+        self.next_order += 1
+        heapq.heappush(self.queue, (self.time + self.delay(entity), self.orders[id(entity)], entity))
+
+    def remove(self, entity: "Entity") -> None:
+        """ Forgets a monster. Its queue entry is skipped when it comes up. """
+        self.orders.pop(id(entity), None)
+        self.asleep.pop(id(entity), None)
+        self.remainders.pop(id(entity), None)
+
+    def wake_within(self, x: int, y: int, radius: int) -> None:
+        """ Wakes every dozing monster within radius tiles (on both axes) of (x, y), as a noise there would. """
+        if not self.asleep:
+            return
+
+        count = self.store.count
+        rows = np.flatnonzero(self.store.actor[:count] &
+                              (np.abs(self.store.x[:count] - x) <= radius) &
+                              (np.abs(self.store.y[:count] - y) <= radius))
+        for row in rows:
+            entity = self.asleep.pop(id(self.store.entities[row]), None)
+            if entity is not None:
+                # It rejoins in the coming phase, in its usual place among the monsters acting at the same time.
+                heapq.heappush(self.queue, (self.time + const.ACTION_COST, self.orders[id(entity)], entity))
+
+    def is_far(self, entity: "Entity", player: "Entity") -> bool:
+        return max(abs(entity.x - player.x), abs(entity.y - player.y)) > self.wake_radius
+
+    def phase(self, player: "Entity") -> Iterator["Entity"]:
+        """ Yields the monsters that act in the next enemy phase, in order, and moves time on to its end. """
+        if self.wake_radius and (player.x, player.y) != self.player_position:
+            # Dozing monsters stay put, so only the player moving can bring one into range.
+            self.player_position = (player.x, player.y)
+            self.wake_within(player.x, player.y, self.wake_radius)
+
+        self.time += const.ACTION_COST
+
+        while self.queue and self.queue[0][0] <= self.time:
+            next_time, order, entity = heapq.heappop(self.queue)
+            if self.orders.get(id(entity)) != order:
+                # Removed from the map since it was queued.
+                continue
+            if entity.ai is None:
+                # Dead, or otherwise no longer a monster.
+                del self.orders[id(entity)]
+                self.remainders.pop(id(entity), None)
+                continue
+
+            if self.wake_radius and getattr(entity.ai, "dormant_when_far", False) and self.is_far(entity, player):
+                self.asleep[id(entity)] = entity
+                continue
+
+            heapq.heappush(self.queue, (next_time + self.delay(entity), order, entity))
+            yield entity
+
+    def __len__(self) -> int:
+        """ The number of monsters awake. """
+        return len(self.orders) - len(self.asleep)